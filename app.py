@@ -1,45 +1,202 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, Blueprint, current_app, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from flask_mail import Mail, Message
-from config import DevelopmentConfig
-from models import db, MeetingRoom, User, Room, Plant
+from flask_mail import Mail
+from config import configs
+from models import db, MeetingRoom, User, Room, Plant, EmailOutbox
 from forms import MeetingRoomForm, LoginForm, ForgotPasswordForm, ResetPasswordForm, UserForm, RoomForm
+from slots import day_slots, format_minute, slot_label, slot_starts
+import migrations
+import mailer
+import benchmarks
+import seed as seed_data
+import importer
+import versions
+import counters
+import archive
+from archive import meetings_between
+from occupancy import occupancy, slot_mask, version_name as occupancy_version
+import ics
+from ics import feeds, version_name as feed_version
+from refdata import reference, VERSION_NAMES as REFDATA_VERSIONS
+from identity import identities, version_name as auth_version
+import routing
+import profiling
+from routing import replica_reads
+from pagination import keyset_page
 from datetime import datetime, timedelta, date, timezone
 from functools import wraps
+import click
 import secrets
 from functools import wraps
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import or_
-from flask import make_response
+from sqlalchemy import or_, text
+from sqlalchemy.orm import contains_eager
+from flask import make_response, session, Response, stream_with_context
+import hashlib
+import os
+from itsdangerous import BadSignature, URLSafeSerializer
+import csv
+import io
 
 import logging
-logging.basicConfig(level=logging.DEBUG)
+# DEBUG vuelca cada sentencia de las librerías; para medir rutas usar PROFILING=1
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'))
 
-app = Flask(__name__)
-app.config.from_object(DevelopmentConfig)
-db.init_app(app)
-mail = Mail(app)
+bp = Blueprint('main', __name__, cli_group=None)
+mail = Mail()
 
 # Flask-Login
-login_manager = LoginManager(app)
-login_manager.login_view = 'login'
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
 login_manager.login_message = 'Por favor inicia sesión para acceder a esta página.'
 login_manager.session_protection = 'strong'
 
+# Lecturas desde la réplica (si está configurada) y lectura de lo propio tras escribir
+bp.before_app_request(routing.choose_database)
+bp.after_app_request(routing.stick_after_write)
+
+
+def create_app(config_object=None):
+    """Crea la aplicación sin tocar la base de datos.
+
+    El esquema se crea con `flask upgrade-db` y los datos iniciales con
+    `flask seed`; aquí solo se registran extensiones y vistas. Sin
+    config_object se usa la clase indicada en APP_CONFIG.
+
+    Tampoco arranca los workers de correo: la fábrica también la usan los
+    comandos `flask`. Los arranca la primera solicitud que atiende el
+    proceso (serve()).
+    """
+    app = Flask(__name__)
+    if config_object is None:
+        config_object = configs[os.environ.get('APP_CONFIG', 'development')]
+    app.config.from_object(config_object)
+    db.init_app(app)
+    mail.init_app(app)
+    login_manager.init_app(app)
+    app.register_blueprint(bp)
+    profiling.init_app(app)
+    return app
+
+
+def serve(app):
+    """Arranca los workers de correo en el proceso que atiende solicitudes.
+
+    Solo la primera llamada de cada proceso los arranca. gunicorn.conf.py la
+    llama en post_worker_init (ya en el worker después del fork, así
+    funciona con --preload); en cualquier otro servidor, `flask run`
+    incluido, la llama la primera solicitud.
+    """
+    mailer.start_workers(app)
+    return app
+
+
+@bp.before_app_request
+def start_outbox_workers():
+    app = current_app._get_current_object()
+    if 'outbox_workers' not in app.extensions:
+        serve(app)
+
 @login_manager.user_loader
 def load_user(user_id):
-    return db.session.get(User, int(user_id))
+    return identities.get(int(user_id))
+
+
+@bp.app_template_filter('hora')
+def hora_filter(minute):
+    """480 -> '8:00'"""
+    return format_minute(minute)
+
+
+@bp.app_template_global()
+def page_url(cursor=None):
+    """URL de la vista actual con otro cursor; sin cursor es la primera página."""
+    args = request.args.to_dict()
+    args.pop('cursor', None)
+    if cursor:
+        args['cursor'] = cursor
+    return url_for(request.endpoint, **args)
+
+
+def schedule_version(day, plant_id):
+    return f'schedule:{day.isoformat()}:{plant_id}'
+
+
+def meeting_versions(room_id, day, plant_id=None, created_by=None):
+    """Versiones que cambian con una reunión de esa sala y fecha."""
+    names = [occupancy_version(day), feed_version('room', room_id)]
+    if plant_id is None:
+        # Sin autoflush: la reunión pendiente se escribe en el commit (ver versions.bump)
+        with db.session.no_autoflush:
+            room = db.session.get(Room, room_id)
+        plant_id = room.plant_id if room else None
+    if plant_id:
+        names.extend([schedule_version(day, plant_id), feed_version('plant', plant_id)])
+    if created_by:
+        names.append(feed_version('user', created_by))
+    return names
+
+
+def conditional_get(version_names):
+    """GET condicional con ETag débil derivado de versiones en cache_versions.
+
+    version_names() regresa las versiones de las que depende la página. Si el
+    navegador ya tiene esa versión se responde 304 sin ejecutar la vista.
+    'no-cache' obliga a revalidar en cada carga, así que una página nunca se
+    muestra vieja después de un cambio; los mensajes flash pendientes también
+    fuerzan una respuesta completa.
+
+    'plants' y 'rooms' se toman de la copia en memoria (refdata) con la que
+    se arma la página, no de la base: así el ETag nunca anuncia una versión
+    que el cuerpo todavía no muestra.
+    """
+    def decorator(view):
+        @wraps(view)
+        def conditional_view(*args, **kwargs):
+            names = version_names()
+            current = versions.current(*[name for name in names if name not in REFDATA_VERSIONS])
+            if any(name in REFDATA_VERSIONS for name in names):
+                current.update(reference.get().version)
+            key = '|'.join([
+                str(current_user.id), current_user.username, current_user.role,
+                request.full_path, date.today().isoformat(),
+            ] + [f'{name}={current[name]}' for name in names])
+            etag = hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+            if '_flashes' not in session and request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return conditional_view
+    return decorator
+
+
+def _args_date():
+    try:
+        return datetime.strptime(request.args.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return datetime.now().date()
+
+
+def index_versions():
+    plant_id = request.args.get('plant', type=int)
+    selected_date = _args_date()
+    # Sin planta se muestran todas: occupancy:<fecha> cambia con cualquier reunión del día
+    day_version = schedule_version(selected_date, plant_id) if plant_id else occupancy_version(selected_date)
+    return ['plants', 'rooms', day_version]
 
 
-def no_cache(view):
-    @wraps(view)
-    def no_cache_view(*args, **kwargs):
-        response = make_response(view(*args, **kwargs))
-        response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, post-check=0, pre-check=0, max-age=0'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '-1'
-        return response
-    return no_cache_view
+def rooms_versions():
+    # meeting_count y room_count cambian sin tocar 'rooms' (ver counters.py)
+    return ['plants', 'rooms', counters.VERSION_NAME]
+
+
+def my_meetings_versions():
+    # feed:user:<id> cambia con cada alta, edición o baja de sus reuniones
+    return ['plants', 'rooms', feed_version('user', current_user.id)]
 
 
 # Decoradores de permisos
@@ -49,7 +206,7 @@ def superadmin_required(f):
     def decorated(*args, **kwargs):
         if not current_user.is_superadmin():
             flash('No tienes permisos para acceder a esta página', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
         return f(*args, **kwargs)
     return decorated
 
@@ -60,93 +217,168 @@ def admin_required(f):
     def decorated(*args, **kwargs):
         if not (current_user.is_admin() or current_user.is_superadmin()):
             flash('No tienes permisos para acceder a esta página', 'danger')
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
         return f(*args, **kwargs)
     return decorated
 
-# Función de envío de correo
+# Función de envío de correo: encola en email_outbox, la entrega es en segundo plano
+@profiling.timed('mail')
 def send_email(subject, recipient, body):
     try:
-        msg = Message(subject, recipients=[recipient], body=body)
-        mail.send(msg)
+        mailer.enqueue(subject, recipient, body)
         return True
     except Exception as e:
-        app.logger.error(f"Error al enviar correo: {e}")
+        db.session.rollback()
+        current_app.logger.error(f"Error al encolar correo: {e}")
         return False
 
-# Crear tablas y datos iniciales
-with app.app_context():
+@bp.cli.command('upgrade-db')
+@click.option('--rebuild-slots', is_flag=True, help='Regenera los bloques ocupados (tras cambiar SLOT_MINUTES).')
+def upgrade_db_command(rebuild_slots):
+    """Crea las tablas faltantes y aplica los cambios de esquema pendientes."""
     db.create_all()
-
-    # Crear superadmin 
-    existing = db.session.query(User).filter(
-        or_(User.username == 'superadmin', User.email == 'salaswasion@gmail.com')
-    ).first()
-    if not existing:
-        admin = User(username='superadmin', email='salaswasion@gmail.com', role='superadmin')
-        admin.set_password('admin123')
-        db.session.add(admin)
-        try:
-            db.session.commit()
-            app.logger.info("Super Admin creado: usuario='superadmin', contraseña='admin123'")
-            existing = admin
-        except IntegrityError:
-            db.session.rollback()
-            existing = db.session.query(User).filter_by(username='superadmin').first()
-
-
-
-    # Crear plantas 1 al 7 
-    for i in range(1, 8):
-        name = f"Planta {i}"
-        if not db.session.query(Plant).filter_by(name=name).first():
-            p = Plant(name=name, description=f"Planta {i}", created_by=(existing.id if existing else None))
-            db.session.add(p)
     try:
-        db.session.commit()
-    except IntegrityError:
-        db.session.rollback()
-
-
-
-    # filtro de salas 
-    for i in range(8, 11):
-        name = f"Planta {i}"
-        if not db.session.query(Plant).filter_by(name=name).first():
-            p = Plant(name=name, description=f"Planta {i}", created_by=(existing.id if existing else None))
-            db.session.add(p)
-    try:
-        db.session.commit()
-    except IntegrityError:
-        db.session.rollback()
-
+        migrations.upgrade(rebuild_slots=rebuild_slots)
+    except migrations.MigrationError as e:
+        for detail in e.details:
+            click.echo(detail, err=True)
+        raise click.ClickException(str(e))
+    click.echo('Esquema actualizado')
+
+
+@bp.cli.command('seed')
+def seed_command():
+    """Crea el superadmin y las plantas iniciales si no existen."""
+    created_admin, plants = seed_data.seed()
+    if created_admin:
+        click.echo(f"Super Admin creado: usuario='{seed_data.SUPERADMIN['username']}'")
+    click.echo(f'{plants} plantas nuevas')
+
+
+@bp.cli.command('outbox-worker')
+def outbox_worker_command():
+    """Procesa la cola de correos en primer plano."""
+    click.echo('Procesando la cola de correos (Ctrl+C para salir)')
+    mailer.run_worker(current_app._get_current_object())
+
+
+@bp.cli.command('import-meetings')
+@click.argument('csv_file', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--user', 'user_email', required=True, help='Correo del usuario que queda como creador.')
+@click.option('--chunk-size', type=int, default=None, help='Filas por transacción (IMPORT_CHUNK_SIZE).')
+def import_meetings_command(csv_file, user_email, chunk_size):
+    """Importa reservaciones desde un CSV (ver importer.py para las columnas)."""
+    user = db.session.query(User).filter_by(email=user_email).first()
+    if not user:
+        raise click.BadParameter(f'No existe el usuario {user_email}', param_hint='--user')
+    report = importer.import_meetings(csv_file, user.id, meeting_versions,
+                                      chunk_size or current_app.config['IMPORT_CHUNK_SIZE'])
+    for line, message in report.errors:
+        click.echo(f'Línea {line}: {message}', err=True)
+    click.echo(f'{report.imported} reuniones importadas de {report.rows} filas, {report.failed} con errores')
+
+
+@bp.cli.command('archive-meetings')
+@click.option('--days', type=int, default=None, help='Archivar reuniones de hace más de N días (ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', type=int, default=None, help='Reuniones por transacción (ARCHIVE_BATCH_SIZE).')
+@click.option('--max-batches', type=int, default=None, help='Detenerse tras N lotes (por omisión, hasta terminar).')
+def archive_meetings_command(days, batch_size, max_batches):
+    """Mueve las reuniones pasadas a meeting_rooms_archive (se puede programar en cron)."""
+    before = archive.cutoff(days)
+    moved = archive.archive_meetings(before, batch_size or current_app.config['ARCHIVE_BATCH_SIZE'],
+                                     meeting_versions, max_batches,
+                                     progress=lambda total: click.echo(f'{total} reuniones archivadas...'))
+    if moved is None:
+        click.echo('Otro proceso ya está archivando reuniones', err=True)
+        raise SystemExit(1)
+    click.echo(f'{moved} reuniones anteriores al {before.isoformat()} archivadas')
+
+
+@bp.cli.group()
+def bench():
+    """Mediciones de rendimiento."""
+
+
+@bench.command('passwords')
+@click.option('--method', 'methods', multiple=True,
+              help='Método de Werkzeug a medir (se puede repetir); por omisión varios costos de scrypt y pbkdf2.')
+@click.option('--seconds', default=2.0, show_default=True, help='Tiempo de medición por método.')
+def bench_passwords_command(methods, seconds):
+    """Inicios de sesión por segundo por núcleo para cada método de hash."""
+    current = current_app.config['PASSWORD_HASH_METHOD']
+    for method, elapsed, rate in benchmarks.bench_passwords(methods or None, seconds):
+        marker = ' (actual)' if method == current else ''
+        click.echo(f'{method:<26} {elapsed * 1000:8.1f} ms/hash {rate:8.1f} inicios/s por núcleo{marker}')
+
+
+@bench.command('startup')
+@click.option('--runs', default=5, show_default=True, help='Arranques a medir.')
+def bench_startup_command(runs):
+    """Tiempo de arranque de un worker (import + create_app) y de `flask seed`."""
+    for number, (imported, created) in enumerate(benchmarks.bench_startup(runs), 1):
+        click.echo(f'arranque {number}: import {imported * 1000:7.1f} ms  create_app {created * 1000:7.1f} ms  '
+                   f'total {(imported + created) * 1000:7.1f} ms')
+    seed_times = benchmarks.bench_seed(runs)
+    click.echo(f'flask seed (datos ya creados): {min(seed_times) * 1000:.1f} ms mínimo, '
+               f'{sum(seed_times) / len(seed_times) * 1000:.1f} ms promedio')
+
+
+@bench.command('db-pool')
+@click.option('--threads', default=40, show_default=True, help='Solicitudes simultáneas.')
+@click.option('--requests', 'total', default=2000, show_default=True, help='Total de solicitudes.')
+@click.option('--hold-ms', default=5.0, show_default=True, help='Tiempo que cada solicitud retiene la conexión.')
+def bench_db_pool_command(threads, total, hold_ms):
+    """Prueba de carga del pool de conexiones con la configuración actual."""
+    result = benchmarks.bench_pool(current_app._get_current_object(), threads, total, hold_ms / 1000)
+    click.echo(f"{result['completed']} solicitudes en {result['elapsed']:.2f}s "
+               f"({result['completed'] / result['elapsed']:.1f}/s), {result['timeouts']} sin conexión a tiempo, "
+               f"{result['errors']} errores")
+    click.echo(f"conexión + SELECT 1: p50 {result['wait_p50'] * 1000:.1f} ms  p95 {result['wait_p95'] * 1000:.1f} ms  "
+               f"p99 {result['wait_p99'] * 1000:.1f} ms")
+    click.echo(f"máximo de conexiones en uso: {result['max_checked_out']}  pool al terminar: {result['pool']}")
+
+
+@bench.command('mail')
+@click.option('--count', default=200, show_default=True, help='Mensajes a enviar por modo.')
+@click.option('--handshake-ms', default=0.0, show_default=True,
+              help='Retraso simulado de conexión/STARTTLS/login en el servidor local.')
+@click.option('--real-server', is_flag=True, help='Usar MAIL_SERVER en lugar del servidor SMTP local de prueba.')
+def bench_mail_command(count, handshake_ms, real_server):
+    """Compara una conexión SMTP por mensaje contra la sesión reutilizada."""
+    for mode, elapsed, rate, connections in benchmarks.bench_mail(count, handshake_ms / 1000, not real_server):
+        click.echo(f'{mode:<22} {elapsed:8.3f}s {rate:10.1f} msg/s {connections:6d} conexiones')
 
 
 # LOGIN Y AUTENTICACIÓN
 
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     form = LoginForm()
     if form.validate_on_submit():
         user = db.session.query(User).filter_by(email=form.email.data).first()
         if user and user.check_password(form.password.data):
+            # Hash generado con parámetros anteriores: se actualiza ahora que
+            # se conoce la contraseña
+            if user.password_needs_rehash():
+                user.set_password(form.password.data)
+                db.session.commit()
             login_user(user)
             flash(f'Bienvenido {user.email}!', 'success')
-            return redirect(request.args.get('next') or url_for('index'))
+            return redirect(request.args.get('next') or url_for('main.index'))
         flash('Usuario o contraseña incorrectos', 'danger')
     return render_template('login.html', form=form)
 
-@app.route('/logout')
+@bp.route('/logout')
 @login_required
 def logout():
     logout_user()
     flash('Sesión cerrada exitosamente', 'success')
-    return redirect(url_for('login'))
+    return redirect(url_for('main.login'))
 
-@app.route('/olvide-contrasena', methods=['GET', 'POST'], endpoint='olvide_contrasena')
+@bp.route('/olvide-contrasena', methods=['GET', 'POST'], endpoint='olvide_contrasena')
 def forgot_password():
     form = ForgotPasswordForm()
     if form.validate_on_submit():
@@ -158,10 +390,10 @@ def forgot_password():
                 # CORRECCIÓN: Asegurar que sea timezone-aware
                 user.reset_token_expiry = datetime.now(timezone.utc) + timedelta(hours=1)
                 db.session.commit()
-                app.logger.info(f"Token generado para {user.email}: {token}")
+                current_app.logger.info(f"Token generado para {user.email}: {token}")
                 
-                reset_url = url_for('reset_password', token=token, _external=True)
-                app.logger.info(f"URL de reset: {reset_url}")
+                reset_url = url_for('main.reset_password', token=token, _external=True)
+                current_app.logger.info(f"URL de reset: {reset_url}")
                 
                 body = f"""Hola {user.username},
 
@@ -178,35 +410,35 @@ Si no solicitaste este cambio, puedes ignorar este mensaje.
 Sistema WASION"""
                 
                 if send_email('Restablecer Contraseña - WASION', user.email, body):
-                    flash('Se han enviado instrucciones para restablecer tu contraseña a tu correo electrónico.', 'info')
+                    flash('Las instrucciones para restablecer tu contraseña quedaron en cola de envío a tu correo electrónico.', 'info')
                 else:
-                    flash('Error al enviar el correo. Por favor contacta al administrador.', 'danger')
-                return redirect(url_for('login'))
+                    flash('Error al poner el correo en cola. Por favor contacta al administrador.', 'danger')
+                return redirect(url_for('main.login'))
                 
             except Exception as e:
                 db.session.rollback()
-                app.logger.error(f"Error al generar token: {e}")
+                current_app.logger.error(f"Error al generar token: {e}")
                 flash('Error al procesar la solicitud', 'danger')
-                return redirect(url_for('login'))
+                return redirect(url_for('main.login'))
         else:
             # Seguridad en el correo
             flash('Si el correo existe, recibirás instrucciones para restablecer tu contraseña', 'info')
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
     return render_template('olvide_contraseña.html', form=form)
 
 
 
-@app.route('/reset-password/<token>', methods=['GET', 'POST'])
+@bp.route('/reset-password/<token>', methods=['GET', 'POST'])
 def reset_password(token):
-    app.logger.info(f"Intentando reset con token: {token}")
+    current_app.logger.info(f"Intentando reset con token: {token}")
     
     # Buscar usuario con el token
     user = db.session.query(User).filter_by(reset_token=token).first()
     
     if not user:
-        app.logger.error(f"Token no encontrado: {token}")
+        current_app.logger.error(f"Token no encontrado: {token}")
         flash('El enlace de restablecimiento es inválido o ha expirado', 'danger')
-        return redirect(url_for('olvide_contrasena'))
+        return redirect(url_for('main.olvide_contrasena'))
     
     current_time = datetime.now(timezone.utc)
     
@@ -217,12 +449,12 @@ def reset_password(token):
         else:
             token_expiry_aware = user.reset_token_expiry
             
-        app.logger.info(f"Token expira: {token_expiry_aware}, Hora actual: {current_time}")
+        current_app.logger.info(f"Token expira: {token_expiry_aware}, Hora actual: {current_time}")
         
         if token_expiry_aware < current_time:
-            app.logger.error(f"Token expirado: {token}")
+            current_app.logger.error(f"Token expirado: {token}")
             flash('El enlace de restablecimiento ha expirado', 'danger')
-            return redirect(url_for('olvide_contrasena'))
+            return redirect(url_for('main.olvide_contrasena'))
     
     form = ResetPasswordForm()
     
@@ -231,8 +463,10 @@ def reset_password(token):
             user.set_password(form.password.data)
             user.reset_token = None
             user.reset_token_expiry = None
+            versions.bump(auth_version(user.id))
             db.session.commit()
-            app.logger.info(f"Contraseña actualizada para usuario: {user.username}")
+            identities.invalidate(user.id)
+            current_app.logger.info(f"Contraseña actualizada para usuario: {user.username}")
             
             # TEXTOS DE CORREO DE CONFIRMACIÓN
             body = f"""Hola {user.username},
@@ -247,27 +481,27 @@ Saludos,
 Sistema WASION"""
             
             if send_email('Contraseña Restablecida - WASION', user.email, body):
-                flash('Tu contraseña ha sido actualizada exitosamente. Se ha enviado un correo de confirmación.', 'success')
+                flash('Tu contraseña ha sido actualizada exitosamente. El correo de confirmación quedó en cola de envío.', 'success')
             else:
-                flash('Tu contraseña ha sido actualizada exitosamente, pero hubo un error al enviar el correo de confirmación.', 'warning')
+                flash('Tu contraseña ha sido actualizada exitosamente, pero hubo un error al poner en cola el correo de confirmación.', 'warning')
             
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
             
         except Exception as e:
             db.session.rollback()
-            app.logger.error(f"Error al actualizar contraseña: {e}")
+            current_app.logger.error(f"Error al actualizar contraseña: {e}")
             flash('Error al actualizar la contraseña', 'danger')
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
     
     return render_template('restablecer.html', form=form)
 
 # REGISTRO DE USUARIOS
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def usuario_form():
     """Registro público - crea usuarios con rol 'user'"""
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     form = UserForm()
     
@@ -308,8 +542,8 @@ Sistema WASION"""
             if send_email('Cuenta Creada - WASION', user.email, body):
                 flash('¡Registro exitoso! Revisa tu correo. Ahora puedes iniciar sesión.', 'success')
             else:
-                flash('¡Registro exitoso! Pero hubo un error al enviar el correo de confirmación. Ahora puedes iniciar sesión.', 'warning')
-            return redirect(url_for('login'))
+                flash('¡Registro exitoso! Pero hubo un error al poner en cola el correo de confirmación. Ahora puedes iniciar sesión.', 'warning')
+            return redirect(url_for('main.login'))
         except IntegrityError:
             db.session.rollback()
             flash('Error al registrar usuario (posible duplicado)', 'danger')
@@ -319,13 +553,15 @@ Sistema WASION"""
 
 # CODIGO GESTIÓN DE USUARIOS (SUPERADMIN) 
 
-@app.route('/users')
+@bp.route('/users')
+@replica_reads
 @superadmin_required
 def users():
-    # Usar db.session.query()
-    return render_template('usuarios.html', users=db.session.query(User).all())
+    # Por nombre de usuario (único, ya tiene índice)
+    page = keyset_page(db.session.query(User), [User.username, User.id], request.args.get('cursor'))
+    return render_template('usuarios.html', users=page.items, page=page)
 
-@app.route('/users/add', methods=['GET', 'POST'])
+@bp.route('/users/add', methods=['GET', 'POST'])
 @superadmin_required
 def add_user():
     form = UserForm()
@@ -379,36 +615,38 @@ Sistema WASION"""
             email_sent_admin = send_email('Usuario Creado - WASION', current_user.email, admin_body)
             
             if email_sent_user and email_sent_admin:
-                flash('Usuario creado exitosamente. Se han enviado correos de confirmación.', 'success')
+                flash('Usuario creado exitosamente. Los correos de confirmación quedaron en cola de envío.', 'success')
             elif email_sent_user or email_sent_admin:
-                flash('Usuario creado exitosamente, pero hubo un error al enviar algunos correos.', 'warning')
+                flash('Usuario creado exitosamente, pero hubo un error al poner en cola algunos correos.', 'warning')
             else:
-                flash('Usuario creado exitosamente, pero hubo un error al enviar los correos.', 'warning')
-            return redirect(url_for('users'))
+                flash('Usuario creado exitosamente, pero hubo un error al poner en cola los correos.', 'warning')
+            return redirect(url_for('main.users'))
         except IntegrityError:
             db.session.rollback()
             flash('Error al crear usuario', 'danger')
     return render_template('usuario_form.html', form=form, action='Crear')
 
-@app.route('/users/delete/<int:id>', methods=['POST'])
+@bp.route('/users/delete/<int:id>', methods=['POST'])
 @superadmin_required
 def delete_user(id):
     if id == current_user.id:
         flash('No puedes eliminar tu propio usuario', 'danger')
-        return redirect(url_for('users'))
+        return redirect(url_for('main.users'))
     
     # Usar db.session.get()
     user = db.session.get(User, id)
     if not user:
         flash('Usuario no encontrado', 'danger')
-        return redirect(url_for('users'))
+        return redirect(url_for('main.users'))
     
     user_email = user.email
     user_name = user.username
     user_role = user.role
     
     db.session.delete(user)
+    versions.bump(feed_version('user', id), auth_version(id))
     db.session.commit()
+    identities.invalidate(id)
     
     # TEXTO DE CORREO AL SUPERADMIN QUE ELIMINÓ ALGUNA ACCION DENTRO DEL SISTEMA
     body = f"""Confirmación de Acción - WASION
@@ -427,34 +665,34 @@ Saludos,
 Sistema WASION"""
     
     if send_email('Usuario Eliminado - WASION', current_user.email, body):
-        flash('Usuario eliminado exitosamente. Se ha enviado correo de confirmación.', 'success')
+        flash('Usuario eliminado exitosamente. El correo de confirmación quedó en cola de envío.', 'success')
     else:
-        flash('Usuario eliminado exitosamente, pero hubo un error al enviar el correo de confirmación.', 'warning')
-    return redirect(url_for('users'))
+        flash('Usuario eliminado exitosamente, pero hubo un error al poner en cola el correo de confirmación.', 'warning')
+    return redirect(url_for('main.users'))
 
 
 # SECCION DE CODIGO PARA GESTIÓN DE SALAS (ADMINISTRADOR Y SUPERADMIN)
 
-@app.route('/rooms')
+@bp.route('/rooms')
+@replica_reads
 @admin_required
-@no_cache
+@conditional_get(rooms_versions)
 def rooms():
     plant_id = request.args.get('plant', type=int)
+    query = (db.session.query(Room)
+             .outerjoin(Room.plant)
+             .options(contains_eager(Room.plant)))
     if plant_id:
-        # Usar db.session.query()
-        all_rooms = db.session.query(Room).filter_by(plant_id=plant_id).order_by(Room.name).all()
-    else:
-        all_rooms = db.session.query(Room).order_by(Room.name).all()
-    plants = db.session.query(Plant).order_by(Plant.name).all()
-    return render_template('salas.html', rooms=all_rooms, plants=plants, selected_plant=plant_id)
+        query = query.filter(Room.plant_id == plant_id)
+    page = keyset_page(query, [Room.name, Room.id], request.args.get('cursor'))
+    return render_template('salas.html', rooms=page.items, page=page,
+                           plants=reference.get().plants, selected_plant=plant_id)
 
-@app.route('/rooms/add', methods=['GET', 'POST'])
+@bp.route('/rooms/add', methods=['GET', 'POST'])
 @admin_required
 def add_room():
     form = RoomForm()
-    # Usar db.session.query()
-    plants = db.session.query(Plant).order_by(Plant.name).all()
-    form.plant_id.choices = [(p.id, p.name) for p in plants]
+    form.plant_id.choices = reference.get().plant_choices
     if form.validate_on_submit():
         if db.session.query(Room).filter_by(name=form.name.data).first():
             flash('Ya existe una sala con ese nombre', 'danger')
@@ -468,7 +706,10 @@ def add_room():
             plant_id=form.plant_id.data
         )
         db.session.add(room)
+        counters.count_rooms({room.plant_id: 1})
+        versions.bump('rooms')
         db.session.commit()
+        reference.invalidate()
         
         # TEXTO DE CORREO AL ADMINISTRADOR QUE CREÓ LA SALA
         plant = db.session.get(Plant, form.plant_id.data)
@@ -489,24 +730,23 @@ Saludos,
 Sistema WASION"""
         
         if send_email('Sala Creada - WASION', current_user.email, body):
-            flash('Sala creada exitosamente. Se ha enviado correo de confirmación.', 'success')
+            flash('Sala creada exitosamente. El correo de confirmación quedó en cola de envío.', 'success')
         else:
-            flash('Sala creada exitosamente, pero hubo un error al enviar el correo de confirmación.', 'warning')
-        return redirect(url_for('rooms', plant=form.plant_id.data))
+            flash('Sala creada exitosamente, pero hubo un error al poner en cola el correo de confirmación.', 'warning')
+        return redirect(url_for('main.rooms', plant=form.plant_id.data))
     return render_template('sala_form.html', form=form, action='Crear')
 
-@app.route('/rooms/edit/<int:id>', methods=['GET', 'POST'])
+@bp.route('/rooms/edit/<int:id>', methods=['GET', 'POST'])
 @admin_required
 def edit_room(id):
     # Usar db.session.get()
     room = db.session.get(Room, id)
     if not room:
         flash('Sala no encontrada', 'danger')
-        return redirect(url_for('rooms'))
+        return redirect(url_for('main.rooms'))
     
     form = RoomForm(obj=room)
-    plants = db.session.query(Plant).order_by(Plant.name).all()
-    form.plant_id.choices = [(p.id, p.name) for p in plants]
+    form.plant_id.choices = reference.get().plant_choices
     if form.validate_on_submit():
         existing = db.session.query(Room).filter(Room.name == form.name.data, Room.id != id).first()
         if existing:
@@ -514,11 +754,15 @@ def edit_room(id):
             return render_template('sala_form.html', form=form, action='Editar', room=room)
         
         old_name = room.name
+        if room.plant_id != form.plant_id.data:
+            counters.count_rooms({room.plant_id: -1, form.plant_id.data: 1})
         room.name = form.name.data
         room.description = form.description.data
         room.capacity = form.capacity.data
         room.plant_id = form.plant_id.data
+        versions.bump('rooms')
         db.session.commit()
+        reference.invalidate()
         
         # TEXTO DE CORREO AL ADMINISTRADOR QUE EDITÓ LA SALA
         plant = db.session.get(Plant, form.plant_id.data)
@@ -541,30 +785,33 @@ Saludos,
 Sistema WASION"""
         
         if send_email('Sala Actualizada - WASION', current_user.email, body):
-            flash('Sala actualizada exitosamente. Se ha enviado correo de confirmación.', 'success')
+            flash('Sala actualizada exitosamente. El correo de confirmación quedó en cola de envío.', 'success')
         else:
-            flash('Sala actualizada exitosamente, pero hubo un error al enviar el correo de confirmación.', 'warning')
-        return redirect(url_for('rooms', plant=room.plant_id))
+            flash('Sala actualizada exitosamente, pero hubo un error al poner en cola el correo de confirmación.', 'warning')
+        return redirect(url_for('main.rooms', plant=room.plant_id))
     return render_template('sala_form.html', form=form, action='Editar', room=room)
 
-@app.route('/rooms/delete/<int:id>', methods=['POST'])
+@bp.route('/rooms/delete/<int:id>', methods=['POST'])
 @admin_required
 def delete_room(id):
     # Usar db.session.get()
     room = db.session.get(Room, id)
     if not room:
         flash('Sala no encontrada', 'danger')
-        return redirect(url_for('rooms'))
+        return redirect(url_for('main.rooms'))
     
     room_name = room.name
     plant_name = room.plant.name if room.plant else 'N/A'
     plant_id = room.plant_id
     
-    if room.meetings:
+    if counters.room_has_meetings(id):
         flash('No se puede eliminar la sala porque tiene reuniones asociadas', 'danger')
     else:
         db.session.delete(room)
+        counters.count_rooms({plant_id: -1})
+        versions.bump('rooms')
         db.session.commit()
+        reference.invalidate()
         
         # TEXTO DE CORREO AL ADMIN QUE ELIMINÓ LA SALA
         body = f"""Confirmación de Acción - WASION
@@ -582,17 +829,73 @@ Saludos,
 Sistema WASION"""
         
         if send_email('Sala Eliminada - WASION', current_user.email, body):
-            flash('Sala eliminada exitosamente. Se ha enviado correo de confirmación.', 'success')
+            flash('Sala eliminada exitosamente. El correo de confirmación quedó en cola de envío.', 'success')
         else:
-            flash('Sala eliminada exitosamente, pero hubo un error al enviar el correo de confirmación.', 'warning')
-    return redirect(url_for('rooms', plant=plant_id))
+            flash('Sala eliminada exitosamente, pero hubo un error al poner en cola el correo de confirmación.', 'warning')
+    return redirect(url_for('main.rooms', plant=plant_id))
 
 
 # SECCION DE CODIGO PARA LA GESTIÓN DE REUNIONES
 #################################################
-@app.route('/')
+def build_day_grid(meetings):
+    """Agrupa las reuniones del día por horario en una sola pasada.
+
+    Regresa una lista [(horario, [{'meeting': m, 'can_manage': bool}, ...])]
+    en el orden de la jornada, con los permisos de edición ya resueltos. Una
+    reunión de varios bloques aparece en cada bloque que ocupa.
+    """
+    manage_all = current_user.is_superadmin()
+    user_id = current_user.id
+    slots = day_slots()
+    buckets = {start: [] for start, _ in slots}
+    for m in meetings:
+        entry = {'meeting': m, 'can_manage': manage_all or m.created_by == user_id}
+        for minute in slot_starts(m.start_minute, m.end_minute):
+            bucket = buckets.get(minute)
+            if bucket is not None:
+                bucket.append(entry)
+    return [(slot_label(start, end), buckets[start]) for start, end in slots]
+
+
+def find_conflicts(room_id, day, start_minute, end_minute, exclude_id=None):
+    """Reuniones de la sala cuyo intervalo se empalma con [inicio, fin)."""
+    query = db.session.query(MeetingRoom).filter(
+        MeetingRoom.room_id == room_id,
+        MeetingRoom.date == day,
+        MeetingRoom.start_minute < end_minute,
+        MeetingRoom.end_minute > start_minute
+    )
+    if exclude_id:
+        query = query.filter(MeetingRoom.id != exclude_id)
+    return query.order_by(MeetingRoom.start_minute)
+
+
+def known_conflict(room_id, day, start_minute, end_minute, exclude_id=None, ignore=0):
+    """Reunión que se empalma con el intervalo, o None.
+
+    Si el índice de ocupación dice que está libre no se consulta nada. Si dice
+    que está ocupado se confirma en meeting_rooms: el índice puede llevar
+    hasta OCCUPANCY_VERSION_TTL segundos de atraso respecto a lo que otro
+    proceso liberó, y no debe rechazar una reservación válida. Sin
+    confirmación se deja la decisión al índice único de meeting_slots.
+    """
+    if occupancy.is_free(room_id, day, start_minute, end_minute, ignore=ignore):
+        return None
+    return find_conflicts(room_id, day, start_minute, end_minute, exclude_id).first()
+
+
+def flash_conflict(room_id, day, start_minute, end_minute, exclude_id=None, conflict=None):
+    if conflict is None:
+        conflict = find_conflicts(room_id, day, start_minute, end_minute, exclude_id).first()
+    if conflict:
+        flash(f'Ya existe una reunión reservada en ese horario y sala ({conflict.time_slot}: {conflict.subject})', 'danger')
+    else:
+        flash('Ya existe una reunión reservada en ese horario y sala', 'danger')
+
+@bp.route('/')
+@replica_reads
 @login_required
-@no_cache
+@conditional_get(index_versions)
 
 def index():
     plant_id = request.args.get('plant', type=int)
@@ -606,8 +909,12 @@ def index():
         selected_date = datetime.now().date()
         date_str = selected_date.strftime('%Y-%m-%d')
 
-    
-    query = db.session.query(MeetingRoom).join(Room, isouter=True).filter(MeetingRoom.date == selected_date)
+    # Reuniones, salas y plantas en un solo SELECT (room.html usa m.room.plant.name)
+    query = (db.session.query(MeetingRoom)
+             .outerjoin(MeetingRoom.room)
+             .outerjoin(Room.plant)
+             .options(contains_eager(MeetingRoom.room).contains_eager(Room.plant))
+             .filter(MeetingRoom.date == selected_date))
 
     # Filtrar por planta (si aplica)
     if plant_id:
@@ -619,53 +926,143 @@ def index():
     if mine == '1':
         query = query.filter(MeetingRoom.created_by == current_user.id)
 
-    meetings = query.order_by(MeetingRoom.time_slot).all()
-
-    try:
-        plants = db.session.query(Plant).order_by(Plant.name).all()
-    except Exception:
-        plants = []
+    meetings = query.order_by(MeetingRoom.start_minute, Room.name).all()
 
-    try:
-        if plant_id:
-            salas = db.session.query(Room).filter(Room.plant_id == plant_id).order_by(Room.name).all()
-        else:
-            salas = db.session.query(Room).order_by(Room.name).all()
-    except Exception:
-        salas = []
+    ref = reference.get()
 
     return render_template('room.html',
-                           meetings=meetings,
+                           schedule=build_day_grid(meetings),
                            selected_date=date_str,
-                           plants=plants,
-                           salas=salas,                      
+                           plants=ref.plants,
+                           salas=ref.rooms_in(plant_id),
                            selected_plant=plant_id,
                            selected_sala=sala_id,
                            today=date.today().strftime('%Y-%m-%d'),
                            mine=(mine == '1'))
 
-@app.route('/add', methods=['GET', 'POST'])
+@bp.route('/meetings/mine')
+@replica_reads
+@login_required
+@conditional_get(my_meetings_versions)
+def my_meetings():
+    """Reuniones creadas por el usuario desde una fecha (hoy por omisión)."""
+    since = _args_date()
+    query = (db.session.query(MeetingRoom)
+             .outerjoin(MeetingRoom.room)
+             .outerjoin(Room.plant)
+             .options(contains_eager(MeetingRoom.room).contains_eager(Room.plant))
+             .filter(MeetingRoom.created_by == current_user.id, MeetingRoom.date >= since))
+    page = keyset_page(query, [MeetingRoom.date, MeetingRoom.start_minute, MeetingRoom.id],
+                       request.args.get('cursor'))
+    return render_template('mis_reuniones.html', meetings=page.items, page=page,
+                           selected_date=since.strftime('%Y-%m-%d'))
+
+def range_bounds(view, day):
+    """Semana (lunes a domingo) o mes que contiene la fecha."""
+    if view == 'month':
+        start = day.replace(day=1)
+        next_month = (start + timedelta(days=32)).replace(day=1)
+        return start, next_month - timedelta(days=1)
+    start = day - timedelta(days=day.weekday())
+    return start, start + timedelta(days=6)
+
+
+def build_range_matrix(plant_id, start, end):
+    """Matriz salas x días con el número de reuniones y minutos ocupados.
+
+    Las reuniones (activas y archivadas) se agregan en la base de datos con
+    un recorrido del índice por fecha de cada tabla, sin cargar cada reunión.
+    """
+    rooms = reference.get().rooms_in(plant_id)
+    days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+    meetings = meetings_between(start, end)
+    rows = (db.session.query(meetings.c.room_id, meetings.c.date,
+                             db.func.count(meetings.c.id),
+                             db.func.sum(meetings.c.end_minute - meetings.c.start_minute))
+            .join(Room, Room.id == meetings.c.room_id)
+            .filter(Room.plant_id == plant_id)
+            .group_by(meetings.c.room_id, meetings.c.date)
+            .all())
+    cells = {(room_id, day): {'meetings': count, 'minutes': int(minutes or 0)}
+             for room_id, day, count, minutes in rows}
+    return rooms, days, cells
+
+
+def range_request():
+    """Lee view/date/plant de la URL; regresa (vista, planta, inicio, fin)."""
+    view = 'month' if request.args.get('view') == 'month' else 'week'
+    plant_id = request.args.get('plant', type=int)
+    if not plant_id:
+        plant_id = reference.get().first_plant_id
+    start, end = range_bounds(view, _args_date())
+    return view, plant_id, start, end
+
+
+@bp.route('/schedule/range')
+@replica_reads
+@login_required
+def schedule_range():
+    view, plant_id, start, end = range_request()
+    rooms, days, cells = build_range_matrix(plant_id, start, end) if plant_id else ([], [], {})
+    config = current_app.config
+    day_minutes = config['SCHEDULE_END'] - config['SCHEDULE_START']
+    return render_template('calendario.html',
+                           view=view,
+                           rooms=rooms,
+                           days=days,
+                           cells=cells,
+                           day_minutes=day_minutes,
+                           plants=reference.get().plants,
+                           selected_plant=plant_id,
+                           start=start,
+                           end=end,
+                           prev_date=range_bounds(view, start - timedelta(days=1))[0],
+                           next_date=end + timedelta(days=1),
+                           today=date.today())
+
+
+@bp.route('/api/v1/schedule/range')
+@replica_reads
+@login_required
+def api_schedule_range():
+    view, plant_id, start, end = range_request()
+    if not plant_id:
+        return api_error('No hay plantas registradas', 404)
+    rooms, days, cells = build_range_matrix(plant_id, start, end)
+    empty = {'meetings': 0, 'minutes': 0}
+    return jsonify({
+        'view': view,
+        'plant_id': plant_id,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'days': [day.isoformat() for day in days],
+        'rooms': [{
+            'id': room.id,
+            'name': room.name,
+            'capacity': room.capacity,
+            'days': [cells.get((room.id, day), empty) for day in days],
+        } for room in rooms],
+    })
+
+
+@bp.route('/add', methods=['GET', 'POST'])
 @login_required
 def add_meeting():
     form = MeetingRoomForm()
-    plants = db.session.query(Plant).order_by(Plant.name).all()
-    form.plant_id.choices = [(p.id, p.name) for p in plants]
+    ref = reference.get()
+    form.plant_id.choices = ref.plant_choices
 
     selected_plant = None
     if request.method == 'POST' and form.plant_id.data:
         selected_plant = form.plant_id.data
     else:
-        selected_plant = request.args.get('plant', type=int) or (plants[0].id if plants else None)
+        selected_plant = request.args.get('plant', type=int) or ref.first_plant_id
 
-    if selected_plant:
-        rooms = db.session.query(Room).filter_by(plant_id=selected_plant).order_by(Room.name).all()
-    else:
-        rooms = db.session.query(Room).order_by(Room.name).all()
-    form.room_id.choices = [(r.id, f"{r.name} (Cap: {r.capacity})") for r in rooms]
+    form.room_id.choices = ref.room_choices(selected_plant)
 
     if not form.room_id.choices:
         flash('No hay salas disponibles para la planta seleccionada. Un administrador debe crear salas primero.', 'warning')
-        return redirect(url_for('index', plant=selected_plant))
+        return redirect(url_for('main.index', plant=selected_plant))
 
     if form.validate_on_submit():
         if form.date.data < date.today():
@@ -674,20 +1071,21 @@ def add_meeting():
                                  form=form, 
                                  action='Agregar',
                                  today=date.today().strftime('%Y-%m-%d'))
-        if db.session.query(MeetingRoom).filter_by(
-            date=form.date.data, 
-            time_slot=form.time_slot.data,
-            room_id=form.room_id.data
-        ).first():
-            flash('Ya existe una reunión reservada en ese horario y sala', 'danger')
+        if form.recurrence.data != 'none':
+            return add_recurring_meeting(form, selected_plant)
+        # Descarte rápido con el índice de ocupación en memoria
+        conflict = known_conflict(form.room_id.data, form.date.data, form.start_minute.data, form.end_minute.data)
+        if conflict:
+            flash_conflict(form.room_id.data, form.date.data, form.start_minute.data, form.end_minute.data,
+                           conflict=conflict)
             return render_template('formulario.html', 
                                  form=form, 
                                  action='Agregar',
                                  today=date.today().strftime('%Y-%m-%d'))
-        
         meeting = MeetingRoom(
             room_id=form.room_id.data,
-            time_slot=form.time_slot.data, 
+            start_minute=form.start_minute.data,
+            end_minute=form.end_minute.data,
             leader=form.leader.data,
             leader_email=form.leader_email.data, 
             subject=form.subject.data,
@@ -695,8 +1093,22 @@ def add_meeting():
             date=form.date.data, 
             created_by=current_user.id
         )
+        meeting.book_slots(slot_starts(meeting.start_minute, meeting.end_minute))
         db.session.add(meeting)
-        db.session.commit()
+        counters.count_meetings({meeting.room_id: 1})
+        versions.bump(*meeting_versions(meeting.room_id, meeting.date, created_by=current_user.id))
+        # El índice único de meeting_slots resuelve los empalmes,
+        # incluso entre dos solicitudes simultáneas
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash_conflict(form.room_id.data, form.date.data, form.start_minute.data, form.end_minute.data)
+            return render_template('formulario.html', 
+                                 form=form, 
+                                 action='Agregar',
+                                 today=date.today().strftime('%Y-%m-%d'))
+        occupancy.apply([(meeting.room_id, meeting.date, meeting.start_minute, meeting.end_minute, True)])
         
         room = db.session.get(Room, form.room_id.data)
         
@@ -743,51 +1155,256 @@ Sistema de Salas WASION"""
             email_sent_user = send_email('Reservación Creada - WASION', current_user.email, body_user)
         
         if email_sent_leader and email_sent_user:
-            flash('Reunión agregada exitosamente. Se han enviado correos de confirmación.', 'success')
+            flash('Reunión agregada exitosamente. Los correos de confirmación quedaron en cola de envío.', 'success')
         elif email_sent_leader or email_sent_user:
-            flash('Reunión agregada exitosamente, pero hubo un error al enviar algunos correos.', 'warning')
+            flash('Reunión agregada exitosamente, pero hubo un error al poner en cola algunos correos.', 'warning')
         else:
-            flash('Reunión agregada exitosamente, pero hubo un error al enviar los correos.', 'warning')
-        return redirect(url_for('index', date=form.date.data.strftime('%Y-%m-%d'), plant=selected_plant))
+            flash('Reunión agregada exitosamente, pero hubo un error al poner en cola los correos.', 'warning')
+        return redirect(url_for('main.index', date=form.date.data.strftime('%Y-%m-%d'), plant=selected_plant))
     
     if not form.date.data:
         form.date.data = date.today()
 
     if request.args.get('plant', type=int) and not form.plant_id.data:
         form.plant_id.data = request.args.get('plant', type=int)
+
+    # Valores sugeridos desde la búsqueda de salas libres
+    if request.method == 'GET':
+        if request.args.get('sala', type=int):
+            form.room_id.data = request.args.get('sala', type=int)
+        if request.args.get('start', type=int) is not None:
+            form.start_minute.data = request.args.get('start', type=int)
+        if request.args.get('end', type=int) is not None:
+            form.end_minute.data = request.args.get('end', type=int)
+        try:
+            form.date.data = datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+        except (KeyError, ValueError):
+            pass
     
     return render_template('formulario.html', 
                          form=form, 
                          action='Agregar',
                          today=date.today().strftime('%Y-%m-%d'))
 
-@app.route('/edit/<int:id>', methods=['GET', 'POST'])
+def expand_recurrence(first, rule, until=None, count=None, limit=52):
+    """Fechas de una serie diaria o semanal a partir de la primera."""
+    step = timedelta(days=1 if rule == 'daily' else 7)
+    dates = []
+    day = first
+    while len(dates) < limit and (count is None or len(dates) < count) and (until is None or day <= until):
+        dates.append(day)
+        day += step
+    return dates
+
+
+def find_series_conflicts(room_id, dates, start_minute, end_minute):
+    """Reuniones que se empalman con el horario en cualquiera de las fechas (una consulta)."""
+    return (db.session.query(MeetingRoom)
+            .filter(MeetingRoom.room_id == room_id,
+                    MeetingRoom.date.in_(dates),
+                    MeetingRoom.start_minute < end_minute,
+                    MeetingRoom.end_minute > start_minute)
+            .order_by(MeetingRoom.date, MeetingRoom.start_minute)
+            .all())
+
+
+def series_report(dates, conflicts):
+    """[(fecha, reunión que la ocupa o None)] para mostrar en el formulario."""
+    by_date = {}
+    for m in conflicts:
+        by_date.setdefault(m.date, m)
+    return [(day, by_date.get(day)) for day in dates]
+
+
+def add_recurring_meeting(form, selected_plant):
+    """Reserva todas las fechas de una serie en una sola transacción."""
+    room_id = form.room_id.data
+    start, end = form.start_minute.data, form.end_minute.data
+    dates = expand_recurrence(form.date.data, form.recurrence.data,
+                              until=form.repeat_until.data,
+                              count=form.repeat_count.data,
+                              limit=current_app.config['RECURRENCE_MAX_OCCURRENCES'])
+
+    conflicts = find_series_conflicts(room_id, dates, start, end)
+    busy_dates = {m.date for m in conflicts}
+    free_dates = [day for day in dates if day not in busy_dates]
+    if not free_dates or (conflicts and not form.skip_conflicts.data):
+        flash('Algunas fechas de la serie ya están ocupadas. Revisa el detalle o marca "Omitir fechas ocupadas".', 'danger')
+        return render_template('formulario.html', 
+                             form=form, 
+                             action='Agregar',
+                             series=series_report(dates, conflicts),
+                             today=date.today().strftime('%Y-%m-%d'))
+
+    starts = slot_starts(start, end)
+    meetings = []
+    version_names = []
+    for day in free_dates:
+        meeting = MeetingRoom(
+            room_id=room_id,
+            start_minute=start,
+            end_minute=end,
+            leader=form.leader.data,
+            leader_email=form.leader_email.data,
+            subject=form.subject.data,
+            remarks=form.remarks.data,
+            date=day,
+            created_by=current_user.id
+        )
+        meeting.book_slots(starts)
+        meetings.append(meeting)
+        version_names.extend(meeting_versions(room_id, day, created_by=current_user.id))
+    db.session.add_all(meetings)
+    counters.count_meetings({room_id: len(meetings)})
+    versions.bump(*version_names)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Alguien reservó una de las fechas entre la revisión y el commit
+        db.session.rollback()
+        flash('Alguna de las fechas se reservó mientras se procesaba la serie. Revisa el detalle.', 'danger')
+        return render_template('formulario.html', 
+                             form=form, 
+                             action='Agregar',
+                             series=series_report(dates, find_series_conflicts(room_id, dates, start, end)),
+                             today=date.today().strftime('%Y-%m-%d'))
+    occupancy.apply([(room_id, day, start, end, True) for day in free_dates])
+
+    room = db.session.get(Room, room_id)
+    first = meetings[0]
+    date_lines = '\n'.join(f"- {day.strftime('%d/%m/%Y')}" for day in free_dates)
+    skipped_lines = '\n'.join(f"- {day.strftime('%d/%m/%Y')}" for day in sorted(busy_dates)) or '- Ninguna'
+
+    # UN SOLO CORREO DE RESUMEN PARA TODA LA SERIE
+    body_leader = f"""Hola {first.leader},
+
+Se ha reservado una serie de reuniones a tu nombre.
+
+Detalles de la Serie:
+- Sala: {room.name if room else 'N/A'}
+- Planta: {room.plant.name if room and room.plant else 'N/A'}
+- Horario: {first.time_slot}
+- Asunto: {first.subject}
+- Observaciones: {first.remarks or 'N/A'}
+
+Fechas reservadas ({len(free_dates)}):
+{date_lines}
+
+Fechas omitidas por estar ocupadas:
+{skipped_lines}
+
+Reservado por: {current_user.username}
+
+Saludos,
+Sistema de Salas WASION"""
+
+    email_sent_leader = send_email('Confirmación de Serie de Reservaciones - WASION', first.leader_email, body_leader)
+
+    email_sent_user = True
+    if current_user.email != first.leader_email:
+        body_user = f"""Hola {current_user.username},
+
+Has reservado exitosamente una serie de reuniones.
+
+Detalles de la Serie:
+- Sala: {room.name if room else 'N/A'}
+- Planta: {room.plant.name if room and room.plant else 'N/A'}
+- Horario: {first.time_slot}
+- Líder: {first.leader}
+- Email líder: {first.leader_email}
+- Asunto: {first.subject}
+
+Fechas reservadas ({len(free_dates)}):
+{date_lines}
+
+Fechas omitidas por estar ocupadas:
+{skipped_lines}
+
+Saludos,
+Sistema de Salas WASION"""
+
+        email_sent_user = send_email('Serie de Reservaciones Creada - WASION', current_user.email, body_user)
+
+    message = f'Serie agregada: {len(free_dates)} reuniones'
+    if busy_dates:
+        message += f" ({len(busy_dates)} fechas ocupadas omitidas)"
+    if email_sent_leader and email_sent_user:
+        flash(f'{message}. Los correos de confirmación quedaron en cola de envío.', 'success')
+    else:
+        flash(f'{message}, pero hubo un error al poner en cola los correos.', 'warning')
+    return redirect(url_for('main.index', date=free_dates[0].strftime('%Y-%m-%d'), plant=selected_plant))
+
+
+@bp.route('/search')
+@replica_reads
+@login_required
+def search_rooms():
+    """Salas libres de todas las plantas para una fecha, horario y capacidad mínima."""
+    date_str = request.args.get('date', date.today().strftime('%Y-%m-%d'))
+    start = request.args.get('start', type=int)
+    end = request.args.get('end', type=int)
+    capacity = request.args.get('capacity', default=1, type=int)
+    plant_id = request.args.get('plant', type=int)
+
+    try:
+        selected_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        selected_date = date.today()
+        date_str = selected_date.strftime('%Y-%m-%d')
+
+    # Mismas opciones que MeetingRoomForm: inicios y fines de los bloques de la jornada
+    slots = day_slots()
+    results = None
+    if 'start' in request.args or 'end' in request.args:
+        if start not in {slot[0] for slot in slots} or end not in {slot[1] for slot in slots}:
+            flash('Selecciona una hora de inicio y de término dentro de la jornada', 'danger')
+        elif end <= start:
+            flash('La hora de término debe ser posterior a la hora de inicio', 'danger')
+        else:
+            # Sin consultas en el caso común: las salas salen de la copia en
+            # memoria (refdata) y los bloques ocupados del índice de ocupación.
+            # Orden: la capacidad más ajustada primero
+            candidates = [room for room in reference.get().rooms_in(plant_id or None)
+                          if room.capacity >= capacity]
+            free = set(occupancy.free_rooms([room.id for room in candidates], selected_date, start, end))
+            results = sorted((room for room in candidates if room.id in free),
+                             key=lambda room: (room.capacity, room.plant.name if room.plant else '', room.name))
+
+    return render_template('buscar.html',
+                           results=results,
+                           slots=slots,
+                           plants=reference.get().plants,
+                           selected_date=date_str,
+                           selected_start=start,
+                           selected_end=end,
+                           selected_plant=plant_id,
+                           capacity=capacity,
+                           today=date.today().strftime('%Y-%m-%d'))
+
+@bp.route('/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
 def edit_meeting(id):
     # Usar db.session.get()
     meeting = db.session.get(MeetingRoom, id)
     if not meeting:
         flash('Reunión no encontrada', 'danger')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     # Verificar permisos: superadmin o creador de la reunión
     if not (current_user.is_superadmin() or current_user.id == meeting.created_by):
         flash('No tienes permisos para editar esta reunión', 'danger')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     form = MeetingRoomForm(obj=meeting)
-    plants = db.session.query(Plant).order_by(Plant.name).all()
-    form.plant_id.choices = [(p.id, p.name) for p in plants]
+    ref = reference.get()
+    form.plant_id.choices = ref.plant_choices
 
-    if meeting.room and meeting.room.plant_id:
-        form.plant_id.data = meeting.room.plant_id
+    room = ref.rooms_by_id.get(meeting.room_id)
+    if room and room.plant_id:
+        form.plant_id.data = room.plant_id
 
-    selected_plant = form.plant_id.data or (plants[0].id if plants else None)
-    if selected_plant:
-        rooms = db.session.query(Room).filter_by(plant_id=selected_plant).order_by(Room.name).all()
-    else:
-        rooms = db.session.query(Room).order_by(Room.name).all()
-    form.room_id.choices = [(r.id, f"{r.name} (Cap: {r.capacity})") for r in rooms]
+    selected_plant = form.plant_id.data or ref.first_plant_id
+    form.room_id.choices = ref.room_choices(selected_plant)
 
     if form.validate_on_submit():
         if form.date.data < date.today():
@@ -797,14 +1414,16 @@ def edit_meeting(id):
                                  action='Editar', 
                                  meeting=meeting,
                                  today=date.today().strftime('%Y-%m-%d'))
-        
-        if db.session.query(MeetingRoom).filter(
-            MeetingRoom.date == form.date.data,
-            MeetingRoom.time_slot == form.time_slot.data,
-            MeetingRoom.room_id == form.room_id.data,
-            MeetingRoom.id != id
-        ).first():
-            flash('Ya existe una reunión reservada en ese horario y sala', 'danger')
+
+        # Los bloques de la propia reunión no cuentan como empalme
+        own_bits = 0
+        if meeting.room_id == form.room_id.data and meeting.date == form.date.data:
+            own_bits = slot_mask(meeting.start_minute, meeting.end_minute)
+        conflict = known_conflict(form.room_id.data, form.date.data, form.start_minute.data, form.end_minute.data,
+                                  exclude_id=id, ignore=own_bits)
+        if conflict:
+            flash_conflict(form.room_id.data, form.date.data, form.start_minute.data, form.end_minute.data,
+                           exclude_id=id, conflict=conflict)
             return render_template('formulario.html', 
                                  form=form, 
                                  action='Editar', 
@@ -814,15 +1433,36 @@ def edit_meeting(id):
         old_date = meeting.date.strftime('%d/%m/%Y')
         old_time = meeting.time_slot
         old_room = meeting.room.name if meeting.room else 'N/A'
+        released = (meeting.room_id, meeting.date, meeting.start_minute, meeting.end_minute, False)
         
+        # Liberar los bloques actuales antes de ocupar los nuevos
+        meeting.slots = []
+        db.session.flush()
+
         meeting.room_id = form.room_id.data
-        meeting.time_slot = form.time_slot.data
+        meeting.start_minute = form.start_minute.data
+        meeting.end_minute = form.end_minute.data
         meeting.leader = form.leader.data
         meeting.leader_email = form.leader_email.data
         meeting.subject = form.subject.data
         meeting.remarks = form.remarks.data
         meeting.date = form.date.data
-        db.session.commit()
+        meeting.book_slots(slot_starts(meeting.start_minute, meeting.end_minute))
+        if meeting.room_id != released[0]:
+            counters.count_meetings({released[0]: -1, meeting.room_id: 1})
+        versions.bump(*meeting_versions(released[0], released[1], created_by=meeting.created_by),
+                      *meeting_versions(meeting.room_id, meeting.date, created_by=meeting.created_by))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash_conflict(form.room_id.data, form.date.data, form.start_minute.data, form.end_minute.data, exclude_id=id)
+            return render_template('formulario.html', 
+                                 form=form, 
+                                 action='Editar', 
+                                 meeting=meeting,
+                                 today=date.today().strftime('%Y-%m-%d'))
+        occupancy.apply([released, (meeting.room_id, meeting.date, meeting.start_minute, meeting.end_minute, True)])
         
         room = db.session.get(Room, form.room_id.data)
         
@@ -884,12 +1524,12 @@ Sistema WASION"""
             email_sent_user = send_email('Reunión Actualizada - WASION', current_user.email, body_user)
         
         if email_sent_leader and email_sent_user:
-            flash('Reunión actualizada exitosamente. Se han enviado correos de confirmación.', 'success')
+            flash('Reunión actualizada exitosamente. Los correos de confirmación quedaron en cola de envío.', 'success')
         elif email_sent_leader or email_sent_user:
-            flash('Reunión actualizada exitosamente, pero hubo un error al enviar algunos correos.', 'warning')
+            flash('Reunión actualizada exitosamente, pero hubo un error al poner en cola algunos correos.', 'warning')
         else:
-            flash('Reunión actualizada exitosamente, pero hubo un error al enviar los correos.', 'warning')
-        return redirect(url_for('index', date=meeting.date.strftime('%Y-%m-%d'), plant=selected_plant))
+            flash('Reunión actualizada exitosamente, pero hubo un error al poner en cola los correos.', 'warning')
+        return redirect(url_for('main.index', date=meeting.date.strftime('%Y-%m-%d'), plant=selected_plant))
     
     return render_template('formulario.html', 
                          form=form, 
@@ -897,19 +1537,19 @@ Sistema WASION"""
                          meeting=meeting,
                          today=date.today().strftime('%Y-%m-%d'))
 
-@app.route('/delete/<int:id>', methods=['POST'])
+@bp.route('/delete/<int:id>', methods=['POST'])
 @login_required
 def delete_meeting(id):
     # Usar db.session.get()
     meeting = db.session.get(MeetingRoom, id)
     if not meeting:
         flash('Reunión no encontrada', 'danger')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     # Verificar permisos: superadmin o creador de la reunión
     if not (current_user.is_superadmin() or current_user.id == meeting.created_by):
         flash('No tienes permisos para eliminar esta reunión', 'danger')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
     date_str = meeting.date.strftime('%Y-%m-%d')
     plant_id = None
@@ -928,8 +1568,12 @@ def delete_meeting(id):
         'remarks': meeting.remarks or 'N/A'
     }
     
+    released = (meeting.room_id, meeting.date, meeting.start_minute, meeting.end_minute, False)
     db.session.delete(meeting)
+    counters.count_meetings({meeting.room_id: -1})
+    versions.bump(*meeting_versions(meeting.room_id, meeting.date, created_by=meeting.created_by))
     db.session.commit()
+    occupancy.apply([released])
     
     # ENVIO DE CORREO AL LÍDER DE LA REUNIÓN SOBRE LA ACCION
     body_leader = f"""Hola {meeting_info['leader']},
@@ -980,22 +1624,322 @@ Sistema WASION"""
         email_sent_user = send_email('Reunión Eliminada - WASION', current_user.email, body_user)
     
     if email_sent_leader and email_sent_user:
-        flash('Reunión eliminada exitosamente. Se han enviado correos de confirmación.', 'success')
+        flash('Reunión eliminada exitosamente. Los correos de confirmación quedaron en cola de envío.', 'success')
     elif email_sent_leader or email_sent_user:
-        flash('Reunión eliminada exitosamente, pero hubo un error al enviar algunos correos.', 'warning')
+        flash('Reunión eliminada exitosamente, pero hubo un error al poner en cola algunos correos.', 'warning')
     else:
-        flash('Reunión eliminada exitosamente, pero hubo un error al enviar los correos.', 'warning')
-    return redirect(url_for('index', date=date_str, plant=plant_id))
+        flash('Reunión eliminada exitosamente, pero hubo un error al poner en cola los correos.', 'warning')
+    return redirect(url_for('main.index', date=date_str, plant=plant_id))
+
+
+# API JSON DE SOLO LECTURA (v1)
+# Cada endpoint carga relaciones con una sola consulta antes de llamar a
+# to_dict(), que de otro modo haría una consulta por registro.
+def api_error(message, status=400):
+    return jsonify({'error': message}), status
+
+
+def api_items(items, allowed_fields):
+    """Serializa con to_dict() y aplica ?fields=id,name si se indicó."""
+    fields = request.args.get('fields')
+    data = [item.to_dict() for item in items]
+    if not fields:
+        return jsonify({'count': len(data), 'items': data})
+    selected = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in selected if field not in allowed_fields]
+    if unknown:
+        return api_error(f"Campos no válidos: {', '.join(unknown)}")
+    return jsonify({'count': len(data), 'items': [{field: row[field] for field in selected} for row in data]})
+
+
+def api_date(name, default=None):
+    value = request.args.get(name)
+    if not value:
+        return default
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+@bp.route('/api/v1/plants')
+@replica_reads
+@login_required
+def api_plants():
+    plants = db.session.query(Plant).order_by(Plant.name).all()
+    return api_items(plants, ('id', 'name', 'description', 'created_at'))
+
+
+@bp.route('/api/v1/rooms')
+@replica_reads
+@login_required
+def api_rooms():
+    query = (db.session.query(Room)
+             .outerjoin(Room.plant)
+             .options(contains_eager(Room.plant)))
+    plant_id = request.args.get('plant', type=int)
+    if plant_id:
+        query = query.filter(Room.plant_id == plant_id)
+    min_capacity = request.args.get('capacity', type=int)
+    if min_capacity:
+        query = query.filter(Room.capacity >= min_capacity)
+    rooms = query.order_by(Plant.name, Room.name).all()
+    return api_items(rooms, ('id', 'name', 'description', 'capacity', 'plant_id', 'plant', 'created_at'))
+
+
+@bp.route('/api/v1/schedule')
+@replica_reads
+@login_required
+def api_schedule():
+    try:
+        selected_date = api_date('date', date.today())
+    except ValueError:
+        return api_error('Fecha inválida, use AAAA-MM-DD')
+
+    query = (db.session.query(MeetingRoom)
+             .outerjoin(MeetingRoom.room)
+             .outerjoin(Room.plant)
+             .options(contains_eager(MeetingRoom.room).contains_eager(Room.plant))
+             .filter(MeetingRoom.date == selected_date))
+    plant_id = request.args.get('plant', type=int)
+    if plant_id:
+        query = query.filter(Room.plant_id == plant_id)
+    room_id = request.args.get('room', type=int)
+    if room_id:
+        query = query.filter(MeetingRoom.room_id == room_id)
+    meetings = query.order_by(MeetingRoom.start_minute, Room.name).all()
+    return api_items(meetings, ('id', 'room_id', 'room_name', 'plant_id', 'plant_name', 'time_slot',
+                                'start_minute', 'end_minute', 'leader', 'leader_email', 'subject',
+                                'remarks', 'date', 'created_at'))
+
+
+# COLA DE CORREOS (ADMINISTRADOR Y SUPERADMIN)
+@bp.route('/outbox')
+@admin_required
+def outbox():
+    status = request.args.get('status')
+    query = db.session.query(EmailOutbox)
+    if status:
+        query = query.filter(EmailOutbox.status == status)
+    emails = query.order_by(EmailOutbox.id.desc()).limit(200).all()
+    counts = dict(db.session.query(EmailOutbox.status, db.func.count(EmailOutbox.id))
+                  .group_by(EmailOutbox.status).all())
+    return render_template('outbox.html', emails=emails, counts=counts, selected_status=status)
+
+@bp.route('/outbox/retry/<int:id>', methods=['POST'])
+@admin_required
+def retry_email(id):
+    if mailer.requeue(id):
+        flash('Correo enviado de nuevo a la cola', 'success')
+    else:
+        flash('Solo se pueden reintentar correos descartados', 'danger')
+    return redirect(url_for('main.outbox', status='dead'))
+
+
+@bp.route('/meetings/import', methods=['GET', 'POST'])
+@admin_required
+def import_meetings():
+    report = None
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash('Selecciona un archivo CSV', 'danger')
+        else:
+            report = importer.import_meetings(importer.text_stream(upload.stream), current_user.id,
+                                              meeting_versions, current_app.config['IMPORT_CHUNK_SIZE'])
+            if report.imported:
+                flash(f'{report.imported} reuniones importadas de {report.rows} filas', 'success')
+            if report.errors:
+                flash(f'{report.failed} filas no se importaron, revisa el detalle', 'warning')
+    return render_template('importar.html', report=report, columns=importer.COLUMNS)
+
+
+EXPORT_COLUMNS = ['Fecha', 'Inicio', 'Fin', 'Planta', 'Sala', 'Capacidad', 'Líder',
+                  'Correo del líder', 'Asunto', 'Observaciones', 'Reservado por', 'Creado']
+
+
+def export_rows(start, end, plant_id=None):
+    """Filas de reuniones entre dos fechas (inclusive) con sala, planta y usuario.
+
+    Incluye las reuniones archivadas. Se leen columnas, no objetos, con
+    yield_per: el driver usa un cursor del lado del servidor y en memoria
+    solo hay un lote a la vez.
+    """
+    meetings = meetings_between(start, end)
+    query = (db.session.query(meetings.c.date, meetings.c.start_minute, meetings.c.end_minute,
+                              Plant.name, Room.name, Room.capacity, meetings.c.leader,
+                              meetings.c.leader_email, meetings.c.subject, meetings.c.remarks,
+                              User.username, meetings.c.created_at)
+             .join(Room, meetings.c.room_id == Room.id)
+             .outerjoin(Plant, Room.plant_id == Plant.id)
+             .outerjoin(User, meetings.c.created_by == User.id))
+    if plant_id:
+        query = query.filter(Room.plant_id == plant_id)
+    query = query.order_by(meetings.c.date, meetings.c.start_minute, Room.name)
+    for row in query.execution_options(yield_per=current_app.config['EXPORT_BATCH_SIZE']):
+        (day, start_minute, end_minute, plant_name, room_name, capacity, leader,
+         leader_email, subject, remarks, username, created_at) = row
+        yield [day.strftime('%Y-%m-%d'), format_minute(start_minute), format_minute(end_minute),
+               plant_name or '', room_name, capacity, leader, leader_email, subject, remarks or '',
+               username or '', created_at.strftime('%Y-%m-%d %H:%M') if created_at else '']
+
+
+def csv_chunks(rows, header, rows_per_chunk=500):
+    """Genera el CSV por partes; el BOM hace que Excel lo abra como UTF-8."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(header)
+    for number, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if number % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+@bp.route('/meetings/export')
+@replica_reads
+@admin_required
+def export_meetings():
+    today = date.today()
+    try:
+        start = api_date('start', today.replace(day=1))
+        end = api_date('end', range_bounds('month', start)[1])
+    except ValueError:
+        flash('Fecha inválida, usa el formato AAAA-MM-DD', 'danger')
+        return redirect(url_for('main.index'))
+    if end < start:
+        flash('La fecha final debe ser posterior a la inicial', 'danger')
+        return redirect(url_for('main.index'))
+    plant_id = request.args.get('plant', type=int)
+
+    filename = f'reuniones_{start.isoformat()}_{end.isoformat()}.csv'
+    response = Response(stream_with_context(csv_chunks(export_rows(start, end, plant_id), EXPORT_COLUMNS)),
+                        mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def pool_status(engine):
+    """Conexiones del pool: tamaño, en uso, libres y de desborde."""
+    pool = engine.pool
+    status = {'class': type(pool).__name__}
+    for name, attribute in (('size', 'size'), ('checked_out', 'checkedout'),
+                            ('idle', 'checkedin'), ('overflow', 'overflow')):
+        if hasattr(pool, attribute):
+            status[name] = getattr(pool, attribute)()
+    # QueuePool reporta el desborde como negativo mientras no se usa
+    if 'overflow' in status:
+        status['overflow'] = max(status['overflow'], 0)
+    return status
+
+
+@bp.route('/health/ready')
+def readiness():
+    """Lista para recibir tráfico si la base de datos responde."""
+    try:
+        db.session.execute(text('SELECT 1'))
+        database = 'ok'
+    except Exception as e:
+        current_app.logger.error(f"Readiness: base de datos no disponible: {e}")
+        db.session.rollback()
+        database = 'error'
+    response = jsonify({'status': 'ok' if database == 'ok' else 'error',
+                        'database': database,
+                        'pool': pool_status(db.engine)})
+    response.status_code = 200 if database == 'ok' else 503
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+# CALENDARIOS ICS
+def feed_serializer():
+    return URLSafeSerializer(current_app.secret_key, salt='calendar-feed')
+
+
+def feed_url(kind, feed_id):
+    """URL de suscripción; el token firmado reemplaza al inicio de sesión."""
+    token = feed_serializer().dumps([kind, feed_id])
+    return url_for('main.calendar_feed', kind=kind, feed_id=feed_id, token=token, _external=True)
+
+
+def build_feed(kind, feed_id, since):
+    """Texto ICS del calendario, o None si la sala, planta o usuario ya no existe."""
+    if kind == 'room':
+        owner = db.session.get(Room, feed_id)
+        name = owner and f'Sala {owner.name}'
+    elif kind == 'plant':
+        owner = db.session.get(Plant, feed_id)
+        name = owner and f'Planta {owner.name}'
+    else:
+        owner = db.session.get(User, feed_id)
+        name = owner and f'Reservaciones de {owner.username}'
+    if owner is None:
+        return None
+
+    query = (db.session.query(MeetingRoom.id, MeetingRoom.date, MeetingRoom.start_minute,
+                              MeetingRoom.end_minute, MeetingRoom.subject, MeetingRoom.leader,
+                              MeetingRoom.leader_email, MeetingRoom.remarks, MeetingRoom.created_at,
+                              Room.name.label('room_name'), Plant.name.label('plant_name'))
+             .join(Room, MeetingRoom.room_id == Room.id)
+             .outerjoin(Plant, Room.plant_id == Plant.id)
+             .filter(MeetingRoom.date >= since))
+    if kind == 'room':
+        query = query.filter(MeetingRoom.room_id == feed_id)
+    elif kind == 'plant':
+        query = query.filter(Room.plant_id == feed_id)
+    else:
+        query = query.filter(MeetingRoom.created_by == feed_id)
+    meetings = query.order_by(MeetingRoom.date, MeetingRoom.start_minute).all()
+    return ics.build_calendar(name, current_app.config['ICS_TIMEZONE'], meetings, current_app.config['ICS_UID_DOMAIN'])
+
+
+@bp.route('/calendar/<kind>/<int:feed_id>.ics')
+@replica_reads
+def calendar_feed(kind, feed_id):
+    try:
+        valid = feed_serializer().loads(request.args.get('token', '')) == [kind, feed_id]
+    except BadSignature:
+        valid = False
+    if kind not in ics.FEED_KINDS or not valid:
+        return make_response('Calendario no encontrado', 404)
+
+    since = ics.window_start(date.today(), current_app.config['ICS_PAST_DAYS'])
+    key = (kind, feed_id, since.isoformat())
+    version = versions.current(feed_version(kind, feed_id), 'rooms', 'plants')
+    etag = feeds.etag(key, version)
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+    else:
+        etag, body = feeds.get(key, version, lambda: build_feed(kind, feed_id, since))
+        if body is None:
+            return make_response('Calendario no encontrado', 404)
+        response = make_response(body)
+        response.mimetype = 'text/calendar'
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@bp.route('/calendars')
+@replica_reads
+@login_required
+def calendars():
+    ref = reference.get()
+    return render_template('calendarios.html',
+                           my_feed=feed_url('user', current_user.id),
+                           plant_feeds=[(p, feed_url('plant', p.id)) for p in ref.plants],
+                           room_feeds=[(r, feed_url('room', r.id)) for r in ref.rooms])
 
 
 # SECCION DE CODIGO PARA LA GESTIÓN DE PLANTAS PARA EL SUPERADMIN
-@app.route('/plants')
+@bp.route('/plants')
+@replica_reads
 @superadmin_required
 def plants():
-    all_plants = db.session.query(Plant).order_by(Plant.name).all()
-    return render_template('plants.html', plants=all_plants)
+    return render_template('plants.html', plants=reference.get().plants)
 
-@app.route('/plants/add', methods=['GET', 'POST'])
+@bp.route('/plants/add', methods=['GET', 'POST'])
 @superadmin_required
 def add_plant():
     if request.method == 'POST':
@@ -1003,13 +1947,15 @@ def add_plant():
         description = request.form.get('description')
         if not name:
             flash('El nombre de la planta es requerido', 'danger')
-            return redirect(url_for('plants'))
+            return redirect(url_for('main.plants'))
         if db.session.query(Plant).filter_by(name=name).first():
             flash('Ya existe una planta con ese nombre', 'danger')
-            return redirect(url_for('plants'))
+            return redirect(url_for('main.plants'))
         p = Plant(name=name, description=description, created_by=current_user.id)
         db.session.add(p)
+        versions.bump('plants')
         db.session.commit()
+        reference.invalidate()
         
         # ENVIO DE CORREO AL SUPERADMIN
         body = f"""Confirmación de Acción - WASION
@@ -1027,30 +1973,32 @@ Saludos,
 Sistema WASION"""
         
         if send_email('Planta Creada - WASION', current_user.email, body):
-            flash('Planta creada. Se ha enviado correo de confirmación.', 'success')
+            flash('Planta creada. El correo de confirmación quedó en cola de envío.', 'success')
         else:
-            flash('Planta creada, pero hubo un error al enviar el correo de confirmación.', 'warning')
-        return redirect(url_for('plants'))
+            flash('Planta creada, pero hubo un error al poner en cola el correo de confirmación.', 'warning')
+        return redirect(url_for('main.plants'))
     return render_template('plant_form.html')
 
-@app.route('/plants/delete/<int:id>', methods=['POST'])
+@bp.route('/plants/delete/<int:id>', methods=['POST'])
 @superadmin_required
 def delete_plant(id):
     # Usar db.session.get()
     plant = db.session.get(Plant, id)
     if not plant:
         flash('Planta no encontrada', 'danger')
-        return redirect(url_for('plants'))
+        return redirect(url_for('main.plants'))
     
     plant_name = plant.name
     plant_desc = plant.description or 'N/A'
     
-    if plant.rooms:
+    if counters.plant_has_rooms(id):
         flash('No se puede eliminar la planta porque tiene salas asociadas', 'danger')
-        return redirect(url_for('plants'))
+        return redirect(url_for('main.plants'))
     
     db.session.delete(plant)
+    versions.bump('plants')
     db.session.commit()
+    reference.invalidate()
     
     # ENVIO DE CORREO AL SUPERADMIN SOBRE LA ACCION
     body = f"""Confirmación de Acción - WASION
@@ -1068,10 +2016,10 @@ Saludos,
 Sistema WASION"""
     
     if send_email('Planta Eliminada - WASION', current_user.email, body):
-        flash('Planta eliminada. Se ha enviado correo de confirmación.', 'success')
+        flash('Planta eliminada. El correo de confirmación quedó en cola de envío.', 'success')
     else:
-        flash('Planta eliminada, pero hubo un error al enviar el correo de confirmación.', 'warning')
-    return redirect(url_for('plants'))
+        flash('Planta eliminada, pero hubo un error al poner en cola el correo de confirmación.', 'warning')
+    return redirect(url_for('main.plants'))
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
\ No newline at end of file
@@ -0,0 +1,179 @@
+"""Archivo de reuniones pasadas.
+
+meeting_rooms solo debe tener lo que todavía se consulta día a día. `flask
+archive-meetings` mueve las reuniones con fecha anterior a
+ARCHIVE_AFTER_DAYS días a meeting_rooms_archive, en lotes de
+ARCHIVE_BATCH_SIZE reuniones: cada lote copia, borra sus bloques de
+meeting_slots y borra las reuniones en una sola transacción, así que
+interrumpir el comando no pierde ni duplica nada y puede correr desde cron.
+
+En MySQL el archivo está particionado por mes (una partición pYYYYMM por mes
+más pmax para lo demás); antes de cada lote se crean las particiones de los
+meses que llegan. Otros motores usan una tabla normal.
+
+La exportación CSV y las vistas semanal y mensual leen de meetings_between(),
+que junta ambas tablas; los contadores de reuniones por sala incluyen las
+archivadas, así que archivar no los modifica.
+"""
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, insert, literal, select, text, union_all
+
+import versions
+from models import db, MeetingArchive, MeetingRoom, MeetingSlot, Room
+from occupancy import occupancy
+
+ARCHIVE_TABLE = MeetingArchive.__tablename__
+LOCK_NAME = 'archive_meetings'
+
+# Columnas que se copian tal cual de meeting_rooms al archivo
+COLUMNS = ('id', 'room_id', 'start_minute', 'end_minute', 'leader', 'leader_email',
+           'subject', 'remarks', 'date', 'created_by', 'created_at')
+
+
+def cutoff(days=None, today=None):
+    """Primera fecha que se queda en meeting_rooms."""
+    days = current_app.config['ARCHIVE_AFTER_DAYS'] if days is None else days
+    return (today or date.today()) - timedelta(days=days)
+
+
+def meetings_between(start, end):
+    """Subconsulta con las reuniones activas y archivadas entre dos fechas.
+
+    Cada rama filtra por fecha por su cuenta para usar su índice (y en el
+    archivo, solo las particiones de esos meses).
+    """
+    def branch(model):
+        return (select(*[getattr(model, name) for name in COLUMNS])
+                .where(model.date >= start, model.date <= end))
+    return union_all(branch(MeetingRoom), branch(MeetingArchive)).subquery('meetings')
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _partition_bounds(conn):
+    """Límites (fecha) de las particiones pYYYYMM existentes; None si no está particionada."""
+    rows = conn.execute(text(
+        'SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS '
+        'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL'
+    ), {'table': ARCHIVE_TABLE}).all()
+    if not rows:
+        return None
+    return sorted(datetime.strptime(description.strip("'"), '%Y-%m-%d').date()
+                  for name, description in rows if description != 'MAXVALUE')
+
+
+def partition_table():
+    """Particiona el archivo por mes en MySQL (idempotente)."""
+    with db.engine.begin() as conn:
+        if conn.dialect.name != 'mysql' or _partition_bounds(conn) is not None:
+            return False
+        conn.execute(text(f'ALTER TABLE {ARCHIVE_TABLE} PARTITION BY RANGE COLUMNS(`date`) '
+                          '(PARTITION pmax VALUES LESS THAN (MAXVALUE))'))
+    return True
+
+
+def ensure_partitions(days):
+    """Crea las particiones de los meses de days que aún caen en pmax.
+
+    Solo se parte pmax, que no recibe filas mientras cada mes archivado tenga
+    su partición, así que la reorganización no mueve datos.
+    """
+    with db.engine.begin() as conn:
+        if conn.dialect.name != 'mysql':
+            return []
+        bounds = _partition_bounds(conn)
+        if bounds is None:
+            return []
+        highest = bounds[-1] if bounds else date.min
+        months = sorted({_month_start(day) for day in days if _next_month(day) > highest})
+        if not months:
+            return []
+        partitions = ', '.join(
+            f"PARTITION p{month:%Y%m} VALUES LESS THAN ('{_next_month(month).isoformat()}')"
+            for month in months)
+        conn.execute(text(f'ALTER TABLE {ARCHIVE_TABLE} REORGANIZE PARTITION pmax INTO '
+                          f'({partitions}, PARTITION pmax VALUES LESS THAN (MAXVALUE))'))
+    return months
+
+
+def archive_batch(before, batch_size, versions_for):
+    """Mueve hasta batch_size reuniones anteriores a before; regresa cuántas."""
+    candidates = (db.session.query(MeetingRoom.id, MeetingRoom.date)
+                  .filter(MeetingRoom.date < before)
+                  .order_by(MeetingRoom.date, MeetingRoom.id)
+                  .limit(batch_size)
+                  .all())
+    db.session.rollback()
+    if not candidates:
+        return 0
+    # DDL fuera de la transacción del lote: en MySQL hace commit implícito
+    ensure_partitions({row.date for row in candidates})
+
+    # Dentro de la transacción se vuelven a leer con bloqueo: una reunión que
+    # se editó a otra fecha después de la primera lectura se queda en
+    # meeting_rooms. La copia y el borrado repiten date < before.
+    rows = (db.session.query(MeetingRoom.id, MeetingRoom.room_id, MeetingRoom.date,
+                             MeetingRoom.start_minute, MeetingRoom.end_minute, MeetingRoom.created_by)
+            .filter(MeetingRoom.id.in_([row.id for row in candidates]), MeetingRoom.date < before)
+            .with_for_update()
+            .all())
+    if not rows:
+        # Todas cambiaron de fecha; el siguiente intento toma otras
+        db.session.rollback()
+        return archive_batch(before, batch_size, versions_for)
+    ids = [row.id for row in rows]
+    plants = dict(db.session.query(Room.id, Room.plant_id).filter(Room.id.in_({row.room_id for row in rows})))
+    source = [getattr(MeetingRoom, name) for name in COLUMNS]
+    db.session.execute(insert(MeetingArchive).from_select(
+        list(COLUMNS) + ['archived_at'],
+        select(*source, literal(datetime.utcnow())).where(MeetingRoom.id.in_(ids), MeetingRoom.date < before)))
+    db.session.execute(delete(MeetingSlot).where(MeetingSlot.meeting_id.in_(ids)))
+    db.session.execute(delete(MeetingRoom).where(MeetingRoom.id.in_(ids), MeetingRoom.date < before))
+    version_names = []
+    for row in rows:
+        version_names.extend(versions_for(row.room_id, row.date, plant_id=plants.get(row.room_id),
+                                          created_by=row.created_by))
+    versions.bump(*version_names)
+    db.session.commit()
+    occupancy.apply([(row.room_id, row.date, row.start_minute, row.end_minute, False) for row in rows])
+    return len(rows)
+
+
+def _acquire_lock(conn):
+    """Evita dos archivados a la vez (MySQL); en otros motores no bloquea."""
+    if conn.dialect.name != 'mysql':
+        return True
+    return bool(conn.execute(text('SELECT GET_LOCK(:name, 0)'), {'name': LOCK_NAME}).scalar())
+
+
+def archive_meetings(before, batch_size, versions_for, max_batches=None, progress=None):
+    """Archiva por lotes hasta terminar o llegar a max_batches.
+
+    Regresa el total movido, o None si otro proceso ya está archivando.
+    """
+    with db.engine.connect() as lock_conn:
+        if not _acquire_lock(lock_conn):
+            return None
+        try:
+            total = 0
+            batches = 0
+            while max_batches is None or batches < max_batches:
+                moved = archive_batch(before, batch_size, versions_for)
+                if not moved:
+                    break
+                total += moved
+                batches += 1
+                if progress:
+                    progress(total)
+            return total
+        finally:
+            if lock_conn.dialect.name == 'mysql':
+                lock_conn.execute(text('SELECT RELEASE_LOCK(:name)'), {'name': LOCK_NAME})
@@ -0,0 +1,254 @@
+"""Mediciones de rendimiento que se ejecutan con `flask bench ...`.
+
+No forman parte de la aplicación web; sirven para comparar configuraciones
+con números reproducibles antes de cambiarlas en producción.
+"""
+import os
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app
+from flask_mail import Connection, Mail, Message
+from sqlalchemy import exc, text
+from werkzeug.security import check_password_hash, generate_password_hash
+
+import seed
+from mailer import SMTPSession
+from models import db
+
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    """Servidor SMTP mínimo que acepta y descarta todo (sin TLS ni login)."""
+
+    def reply(self, line):
+        self.wfile.write(line + b'\r\n')
+
+    def handle(self):
+        self.server.connections += 1
+        time.sleep(self.server.handshake_delay)
+        self.reply(b'220 localhost sink')
+        in_data = False
+        for line in self.rfile:
+            if in_data:
+                if line.rstrip(b'\r\n') == b'.':
+                    in_data = False
+                    self.server.messages += 1
+                    self.reply(b'250 OK')
+                continue
+            command = line[:4].upper()
+            if command in (b'EHLO', b'HELO'):
+                self.reply(b'250 localhost')
+            elif command == b'DATA':
+                in_data = True
+                self.reply(b'354 End data with <CR><LF>.<CR><LF>')
+            elif command == b'QUIT':
+                self.reply(b'221 Bye')
+                return
+            else:
+                self.reply(b'250 OK')
+
+
+class _SinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handshake_delay):
+        super().__init__(('127.0.0.1', 0), _SinkHandler)
+        self.handshake_delay = handshake_delay
+        self.connections = 0
+        self.messages = 0
+
+
+@contextmanager
+def smtp_sink(handshake_delay=0.0):
+    """Levanta el servidor de prueba en un puerto libre de localhost.
+
+    handshake_delay simula el costo de conexión, STARTTLS y login de un
+    servidor real como smtp.gmail.com.
+    """
+    server = _SinkServer(handshake_delay)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def bench_mail(count, handshake_delay=0.0, use_local_sink=True):
+    """Compara mail.send() por mensaje contra una SMTPSession reutilizada.
+
+    Regresa [(modo, segundos, mensajes_por_segundo, conexiones)].
+    """
+    config = dict(current_app.config)
+    config['MAIL_SUPPRESS_SEND'] = False
+
+    def run(server):
+        if server is not None:
+            config.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=server.server_address[1],
+                          MAIL_USE_TLS=False, MAIL_USE_SSL=False,
+                          MAIL_USERNAME=None, MAIL_PASSWORD=None)
+        state = Mail().init_mail(config)
+        recipient = config['MAIL_DEFAULT_SENDER']
+        messages = [Message(f'Benchmark {n}', recipients=[recipient], body='benchmark')
+                    for n in range(count)]
+        results = []
+
+        start = time.perf_counter()
+        for message in messages:
+            with Connection(state) as connection:
+                connection.send(message)
+        elapsed = time.perf_counter() - start
+        results.append(('conexión por mensaje', elapsed, count / elapsed, count))
+
+        smtp = SMTPSession(state, idle_seconds=60)
+        start = time.perf_counter()
+        for message in messages:
+            smtp.send(message)
+        smtp.close()
+        elapsed = time.perf_counter() - start
+        results.append(('sesión reutilizada', elapsed, count / elapsed, smtp.connections_opened))
+        return results
+
+    if use_local_sink:
+        with smtp_sink(handshake_delay) as server:
+            return run(server)
+    return run(None)
+
+
+PASSWORD_METHODS = (
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1',
+    'scrypt:65536:8:1',
+    'pbkdf2:sha256:260000',
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:1000000',
+)
+
+
+def bench_passwords(methods=None, seconds=2.0):
+    """Mide check_password_hash (lo que cuesta un inicio de sesión) en un solo hilo.
+
+    Regresa [(método, segundos_por_hash, inicios_por_segundo)]; el resultado
+    es por núcleo, el total del servidor escala con PASSWORD_HASH_WORKERS.
+    """
+    results = []
+    for method in methods or PASSWORD_METHODS:
+        stored = generate_password_hash('benchmark-password', method)
+        count = 0
+        start = time.perf_counter()
+        while True:
+            check_password_hash(stored, 'benchmark-password')
+            count += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= seconds:
+                break
+        results.append((method, elapsed / count, count / elapsed))
+    return results
+
+
+_STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print(imported - start, created - imported)
+"""
+
+
+def bench_startup(runs=5):
+    """Arranque de un worker en un proceso nuevo, como lo hace gunicorn.
+
+    Regresa [(segundos_import, segundos_create_app)] por corrida.
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', _STARTUP_SCRIPT], cwd=root,
+                                capture_output=True, text=True, check=True).stdout
+        imported, created = output.strip().splitlines()[-1].split()
+        results.append((float(imported), float(created)))
+    return results
+
+
+def bench_seed(runs=5):
+    """Costo de `flask seed` con los datos ya creados.
+
+    Es lo que antes pagaba cada worker al importar app.py.
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        seed.seed()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def bench_pool(app, threads, total, hold_seconds):
+    """Simula solicitudes concurrentes que toman una conexión del pool.
+
+    Cada solicitud abre un contexto de aplicación, ejecuta una consulta,
+    retiene la conexión hold_seconds (el trabajo de la vista) y la regresa al
+    cerrar la sesión, igual que en una solicitud real.
+    """
+    lock = threading.Lock()
+    remaining = [total]
+    waits = []
+    counters = {'completed': 0, 'timeouts': 0, 'errors': 0, 'max_checked_out': 0}
+
+    def worker():
+        while True:
+            with lock:
+                if not remaining[0]:
+                    return
+                remaining[0] -= 1
+            with app.app_context():
+                start = time.perf_counter()
+                try:
+                    db.session.execute(text('SELECT 1'))
+                    waited = time.perf_counter() - start
+                    checked_out = db.engine.pool.checkedout() if hasattr(db.engine.pool, 'checkedout') else 0
+                    time.sleep(hold_seconds)
+                except exc.TimeoutError:
+                    with lock:
+                        counters['timeouts'] += 1
+                    continue
+                except exc.SQLAlchemyError:
+                    with lock:
+                        counters['errors'] += 1
+                    continue
+                finally:
+                    db.session.remove()
+            with lock:
+                counters['completed'] += 1
+                counters['max_checked_out'] = max(counters['max_checked_out'], checked_out)
+                waits.append(waited)
+
+    pool_threads = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in pool_threads:
+        thread.start()
+    for thread in pool_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        pool = db.engine.pool.status()
+    return dict(counters, elapsed=elapsed, pool=pool,
+                wait_p50=_percentile(waits, 0.50),
+                wait_p95=_percentile(waits, 0.95),
+                wait_p99=_percentile(waits, 0.99))
@@ -0,0 +1,76 @@
+"""Contadores desnormalizados: reuniones por sala y salas por planta.
+
+rooms.meeting_count y plants.room_count se muestran en los listados de
+administración sin contar filas en cada carga. Quien agrega, mueve o borra
+reuniones o salas los ajusta con UPDATE ... SET n = n + delta en la misma
+transacción que el cambio, así un rollback también deshace el conteo.
+recount() los recalcula desde cero (`flask upgrade-db` lo hace al crear las
+columnas).
+
+Las reuniones archivadas (archive.py) siguen contando: archivar no cambia
+meeting_count.
+
+Cada ajuste incrementa la versión VERSION_NAME de cache_versions en la misma
+transacción; el listado de salas la incluye en su ETag para no responder 304
+con conteos viejos.
+
+Las revisiones antes de borrar una sala o planta no usan los contadores sino
+EXISTS sobre el índice de la tabla relacionada, que siempre es exacto.
+"""
+from collections import Counter
+
+from sqlalchemy import exists, func, select, update
+
+import versions
+from models import db, MeetingArchive, MeetingRoom, Plant, Room
+
+VERSION_NAME = 'counts'
+
+
+def _adjust(column, deltas):
+    table = column.table
+    # Siempre en el mismo orden de id: dos transacciones que tocan las mismas
+    # filas las bloquean en el mismo orden y no se bloquean entre sí. Sin
+    # autoflush, igual que versions.bump(): los empalmes se detectan en el commit
+    changed = False
+    with db.session.no_autoflush:
+        for key in sorted(deltas):
+            if deltas[key]:
+                db.session.execute(update(table).where(table.c.id == key)
+                                   .values({column.key: column + deltas[key]}))
+                changed = True
+    if changed:
+        versions.bump(VERSION_NAME)
+
+
+def count_meetings(deltas):
+    """deltas: {room_id: +n/-n} dentro de la transacción actual (sin commit)."""
+    _adjust(Room.__table__.c.meeting_count, Counter(deltas))
+
+
+def count_rooms(deltas):
+    """deltas: {plant_id: +n/-n}; se ignoran las salas sin planta."""
+    _adjust(Plant.__table__.c.room_count, Counter({key: delta for key, delta in deltas.items()
+                                                   if key is not None}))
+
+
+def room_has_meetings(room_id):
+    # El archivo no tiene llave foránea hacia rooms; también hay que revisarlo
+    return (db.session.query(exists().where(MeetingRoom.room_id == room_id)).scalar()
+            or db.session.query(exists().where(MeetingArchive.room_id == room_id)).scalar())
+
+
+def plant_has_rooms(plant_id):
+    return db.session.query(exists().where(Room.plant_id == plant_id)).scalar()
+
+
+def recount():
+    rooms = Room.__table__
+    plants = Plant.__table__
+    db.session.execute(update(rooms).values(meeting_count=(
+        select(func.count()).where(MeetingRoom.room_id == rooms.c.id).scalar_subquery()
+        + select(func.count()).where(MeetingArchive.room_id == rooms.c.id).scalar_subquery())))
+    db.session.execute(update(plants).values(room_count=(
+        select(func.count()).where(rooms.c.plant_id == plants.c.id).scalar_subquery())))
+    versions.bump(VERSION_NAME)
+    db.session.commit()
@@ -2,10 +2,11 @@
 from flask_wtf import FlaskForm
 from wtforms import (
     StringField, DateField, SubmitField, TextAreaField, SelectField,
-    PasswordField, IntegerField
+    PasswordField, IntegerField, BooleanField
 )
-from wtforms.validators import DataRequired, Length, Email, EqualTo, NumberRange, ValidationError
+from wtforms.validators import DataRequired, Length, Email, EqualTo, NumberRange, Optional, ValidationError
 from datetime import date
+from slots import day_slots, format_minute
 
 # Compatibilidad con distintas versiones de WTForms
 try:
@@ -16,16 +17,8 @@ except Exception:
     except Exception:
         EmailField = StringField
 
-# Horarios para agendar citas
-TIME_SLOTS = [
-    ('8:00-8:30','8:00-8:30'), ('8:30-9:00','8:30-9:00'), ('9:00-9:30','9:00-9:30'),
-    ('9:30-10:00','9:30-10:00'), ('10:00-10:30','10:00-10:30'), ('10:30-11:00','10:30-11:00'),
-    ('11:00-11:30','11:00-11:30'), ('11:30-12:00','11:30-12:00'), ('12:00-12:30','12:00-12:30'),
-    ('12:30-13:00','12:30-13:00'), ('13:00-13:30','13:00-13:30'), ('13:30-14:00','13:30-14:00'),
-    ('14:00-14:30','14:00-14:30'), ('14:30-15:00','14:30-15:00'), ('15:00-15:30','15:00-15:30'),
-    ('15:30-16:00','15:30-16:00'), ('16:00-16:30','16:00-16:30'), ('16:30-17:00','16:30-17:00'),
-    ('17:00-17:30','17:00-17:30'), ('17:30-18:00','17:30-18:00')
-]
+# Reglas de repetición para reservaciones recurrentes
+RECURRENCE_CHOICES = [('none', 'No se repite'), ('daily', 'Diario'), ('weekly', 'Semanal')]
 
 
 class LoginForm(FlaskForm):
@@ -102,13 +95,37 @@ class MeetingRoomForm(FlaskForm):
     date = DateField('Fecha', format='%Y-%m-%d', validators=[DataRequired()])
     plant_id = SelectField('Planta', coerce=int, validators=[DataRequired()])
     room_id = SelectField('Sala', coerce=int, validators=[DataRequired()])
-    time_slot = SelectField('Horario', choices=TIME_SLOTS, validators=[DataRequired()])
+    start_minute = SelectField('Hora de inicio', coerce=int, validators=[DataRequired()])
+    end_minute = SelectField('Hora de término', coerce=int, validators=[DataRequired()])
     leader = StringField('Responsable/Líder', validators=[DataRequired(), Length(max=100)])
     leader_email = EmailField('Correo del Responsable', validators=[DataRequired(), Email(), Length(max=120)])
     subject = StringField('Asunto', validators=[DataRequired(), Length(max=200)])
     remarks = TextAreaField('Observaciones', validators=[Length(max=300)])
+    recurrence = SelectField('Repetir', choices=RECURRENCE_CHOICES, default='none')
+    repeat_until = DateField('Repetir hasta', format='%Y-%m-%d', validators=[Optional()])
+    repeat_count = IntegerField('Número de veces', validators=[Optional(), NumberRange(min=1, max=365)])
+    skip_conflicts = BooleanField('Omitir fechas ocupadas')
     submit = SubmitField('Guardar')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Los horarios dependen de SCHEDULE_START/SCHEDULE_END/SLOT_MINUTES
+        slots = day_slots()
+        self.start_minute.choices = [(start, format_minute(start)) for start, _ in slots]
+        self.end_minute.choices = [(end, format_minute(end)) for _, end in slots]
     
+    def validate_end_minute(self, field):
+        if self.start_minute.data is not None and field.data <= self.start_minute.data:
+            raise ValidationError('La hora de término debe ser posterior a la hora de inicio.')
+
+    def validate_recurrence(self, field):
+        if field.data != 'none' and not self.repeat_until.data and not self.repeat_count.data:
+            raise ValidationError('Indica hasta qué fecha o cuántas veces se repite la reunión.')
+
+    def validate_repeat_until(self, field):
+        if field.data and self.date.data and field.data < self.date.data:
+            raise ValidationError('La fecha final debe ser posterior a la fecha de la reunión.')
+
     def validate_date(self, field):
         """Validar que la fecha no sea anterior al día de hoy"""
         if field.data < date.today():
@@ -0,0 +1,8 @@
+"""Configuración de gunicorn: gunicorn -c gunicorn.conf.py wsgi:app"""
+
+
+def post_worker_init(worker):
+    # Los hilos no sobreviven al fork: cada worker arranca los suyos después
+    # de cargar la aplicación, también con --preload
+    from app import serve
+    serve(worker.wsgi)
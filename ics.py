@@ -0,0 +1,130 @@
+"""Calendarios iCalendar (.ics) de reservaciones.
+
+Hay un calendario por sala, por planta y por usuario (created_by). Los
+clientes de calendario los consultan cada pocos minutos, así que el texto
+generado se guarda en memoria junto con las versiones de cache_versions de
+las que depende ('feed:<tipo>:<id>', 'rooms' y 'plants'): mientras no cambien
+se sirve el mismo texto, y el ETag permite responder 304 sin generarlo.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone as utc_zone
+from zoneinfo import ZoneInfo
+
+FEED_KINDS = ('room', 'plant', 'user')
+
+
+def version_name(kind, feed_id):
+    return f'feed:{kind}:{feed_id}'
+
+
+def escape_text(value):
+    """Escapa un valor TEXT según RFC 5545."""
+    return (str(value or '').replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def fold(line):
+    """Parte las líneas de más de 75 octetos como pide RFC 5545."""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line
+    parts = []
+    while data:
+        size = 75 if not parts else 74
+        # No cortar a la mitad de un carácter UTF-8
+        while size < len(data) and (data[size] & 0xC0) == 0x80:
+            size -= 1
+        parts.append(data[:size].decode('utf-8'))
+        data = data[size:]
+    return '\r\n '.join(parts)
+
+
+def _utc(day, minute, zone):
+    """Fecha y minuto locales de zone en UTC (forma 'Z' de RFC 5545)."""
+    local = datetime(day.year, day.month, day.day, tzinfo=zone) + timedelta(minutes=minute)
+    return local.astimezone(utc_zone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def build_calendar(name, timezone, meetings, domain):
+    """Texto del calendario.
+
+    meetings son filas con id, date, start_minute, end_minute, subject,
+    leader, leader_email, remarks, created_at, room_name y plant_name.
+
+    Las horas van en UTC: un TZID exige su VTIMEZONE en el mismo archivo y
+    varios clientes descartan o corren los eventos que no lo traen.
+    X-WR-TIMEZONE solo sugiere la zona en que se muestra el calendario.
+    """
+    zone = ZoneInfo(timezone)
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//WASION//Salas de Reuniones//ES',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}',
+        f'X-WR-TIMEZONE:{timezone}',
+    ]
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    for m in meetings:
+        location = m.room_name if not m.plant_name else f'{m.room_name} - {m.plant_name}'
+        description = f'Líder: {m.leader} <{m.leader_email}>'
+        if m.remarks:
+            description += f'\n{m.remarks}'
+        lines.extend([
+            'BEGIN:VEVENT',
+            f'UID:meeting-{m.id}@{domain}',
+            f'DTSTAMP:{m.created_at.strftime("%Y%m%dT%H%M%SZ") if m.created_at else stamp}',
+            f'DTSTART:{_utc(m.date, m.start_minute, zone)}',
+            f'DTEND:{_utc(m.date, m.end_minute, zone)}',
+            f'SUMMARY:{escape_text(m.subject)}',
+            f'LOCATION:{escape_text(location)}',
+            f'DESCRIPTION:{escape_text(description)}',
+            'END:VEVENT',
+        ])
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(fold(line) for line in lines) + '\r\n'
+
+
+class FeedCache(object):
+    """Calendarios generados por proceso, indexados por (tipo, id, desde)."""
+
+    def __init__(self, max_entries=500):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def etag(key, version):
+        raw = '|'.join(str(part) for part in key + tuple(sorted(version.items())))
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key, version, build):
+        """Regresa (etag, texto); build() solo se llama si cambió la versión."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1], entry[2]
+        body = build()
+        etag = self.etag(key, version)
+        with self._lock:
+            self._entries[key] = (version, etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag, body
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def window_start(today, past_days):
+    """Primera fecha incluida en los calendarios."""
+    return today - timedelta(days=past_days)
+
+
+feeds = FeedCache()
@@ -0,0 +1,90 @@
+"""Identidad del usuario en sesión sin consultar la tabla users en cada solicitud.
+
+Flask-Login llama a load_user() antes de cada vista. Aquí se guarda por
+proceso una copia de solo lectura (id, usuario, correo y rol) que se reutiliza
+durante IDENTITY_TTL segundos; al vencer se compara la versión 'auth:<id>'
+de cache_versions y solo si cambió se vuelve a leer el usuario. Borrar un
+usuario o restablecer su contraseña incrementa esa versión, así los demás
+procesos lo notan en a lo más IDENTITY_TTL segundos, y el proceso que hizo el
+cambio lo descarta de inmediato con invalidate().
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from flask_login import UserMixin
+
+import versions
+from models import db, User
+from routing import primary
+
+
+def version_name(user_id):
+    return f'auth:{user_id}'
+
+
+class Identity(UserMixin):
+    """Lo que las vistas y plantillas usan de current_user."""
+
+    def __init__(self, user):
+        self.id = user.id
+        self.username = user.username
+        self.email = user.email
+        self.role = user.role
+
+    def is_superadmin(self):
+        return self.role == 'superadmin'
+
+    def is_admin(self):
+        return self.role == 'admin'
+
+    def is_user(self):
+        return self.role == 'user'
+
+
+class IdentityCache(object):
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _store(self, user_id, entry):
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, user_id):
+        """Identity del usuario o None si ya no existe."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is not None and time.monotonic() - entry['checked_at'] < current_app.config['IDENTITY_TTL']:
+            return entry['identity']
+
+        name = version_name(user_id)
+        with primary():
+            version = versions.current(name)[name]
+            if entry is not None and entry['version'] == version:
+                entry['checked_at'] = time.monotonic()
+                return entry['identity']
+            user = db.session.get(User, user_id)
+        if user is None:
+            self.invalidate(user_id)
+            return None
+        identity = Identity(user)
+        self._store(user_id, {'identity': identity, 'version': version, 'checked_at': time.monotonic()})
+        return identity
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+identities = IdentityCache()
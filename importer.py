@@ -0,0 +1,233 @@
+"""Importación masiva de reservaciones desde CSV.
+
+El archivo se lee como flujo, fila por fila, y se procesa en bloques de
+IMPORT_CHUNK_SIZE: cada fila se valida con las mismas reglas que
+MeetingRoomForm, cada bloque se revisa contra los bloques ocupados con una
+sola consulta y se inserta con sentencias masivas en una sola transacción.
+Solo se conservan los errores, así la memoria no crece con el tamaño del
+archivo.
+
+Columnas (la primera fila es el encabezado):
+    sala, fecha (AAAA-MM-DD), inicio (H:MM), fin (H:MM),
+    lider, correo_lider, asunto, observaciones (opcional)
+"""
+import csv
+import io
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from werkzeug.datastructures import MultiDict
+
+import counters
+import versions
+from forms import MeetingRoomForm
+from models import db, MeetingRoom, MeetingSlot, Room
+from occupancy import occupancy
+from slots import parse_time, slot_starts
+
+COLUMNS = ('sala', 'fecha', 'inicio', 'fin', 'lider', 'correo_lider', 'asunto', 'observaciones')
+REQUIRED_COLUMNS = COLUMNS[:-1]
+
+
+class ImportReport(object):
+    """Resultado de una importación: conteos y errores por fila."""
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.errors.append((line, message))
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+
+def text_stream(binary):
+    """Envuelve un archivo binario (p. ej. request.files) para leerlo como texto."""
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+
+def load_room_map():
+    """{nombre en minúsculas: (id, planta)} de todas las salas, con una consulta."""
+    return {name.strip().lower(): (room_id, plant_id)
+            for room_id, name, plant_id in db.session.query(Room.id, Room.name, Room.plant_id)}
+
+
+def _first_error(form):
+    for field in form:
+        if field.errors:
+            return f'{field.label.text}: {field.errors[0]}'
+    return 'Fila inválida'
+
+
+class ImportRowForm(MeetingRoomForm):
+    """MeetingRoomForm sin planta: la fila solo trae la sala, que puede no tener planta."""
+    plant_id = None
+
+
+def validate_row(form, row, room_map):
+    """Convierte una fila en los datos de una reunión o regresa un mensaje de error.
+
+    form es un ImportRowForm sin CSRF que se reutiliza para todas las filas.
+    """
+    room = room_map.get((row.get('sala') or '').strip().lower())
+    if room is None:
+        return None, f"La sala '{row.get('sala') or ''}' no existe"
+    room_id = room[0]
+    try:
+        start = parse_time(row.get('inicio') or '')
+        end = parse_time(row.get('fin') or '')
+    except ValueError:
+        return None, 'Horario inválido, usa el formato H:MM'
+
+    form.room_id.choices = [(room_id, '')]
+    form.process(MultiDict({
+        'date': (row.get('fecha') or '').strip(),
+        'room_id': room_id,
+        'start_minute': start,
+        'end_minute': end,
+        'leader': (row.get('lider') or '').strip(),
+        'leader_email': (row.get('correo_lider') or '').strip(),
+        'subject': (row.get('asunto') or '').strip(),
+        'remarks': (row.get('observaciones') or '').strip(),
+    }))
+    if not form.validate():
+        return None, _first_error(form)
+    return {
+        'room_id': room_id,
+        'date': form.date.data,
+        'start_minute': form.start_minute.data,
+        'end_minute': form.end_minute.data,
+        'leader': form.leader.data,
+        'leader_email': form.leader_email.data,
+        'subject': form.subject.data,
+        'remarks': form.remarks.data,
+    }, None
+
+
+def _occupied(chunk):
+    """{(sala, fecha): {inicio de bloque, ...}} ya reservados para las filas del bloque."""
+    room_ids = {data['room_id'] for _, data in chunk}
+    dates = {data['date'] for _, data in chunk}
+    taken = {}
+    rows = db.session.query(MeetingSlot.room_id, MeetingSlot.date, MeetingSlot.start_minute).filter(
+        MeetingSlot.room_id.in_(room_ids), MeetingSlot.date.in_(dates))
+    for room_id, day, minute in rows:
+        taken.setdefault((room_id, day), set()).add(minute)
+    return taken
+
+
+def _bulk_insert(rows, created_by):
+    """Inserta las reuniones y sus bloques con tres sentencias por bloque de filas.
+
+    Los ids se recuperan por (sala, fecha, inicio), que no se repite porque el
+    bloque inicial de cada reunión es único; si aparece otra reunión con la
+    misma llave es que alguien reservó en paralelo y se reporta como empalme.
+    """
+    now = datetime.utcnow()
+    db.session.execute(insert(MeetingRoom), [dict(data, created_by=created_by, created_at=now)
+                                             for data in rows])
+    keys = {(data['room_id'], data['date'], data['start_minute']) for data in rows}
+    found = db.session.query(MeetingRoom.id, MeetingRoom.room_id, MeetingRoom.date, MeetingRoom.start_minute).filter(
+        MeetingRoom.room_id.in_({key[0] for key in keys}),
+        MeetingRoom.date.in_({key[1] for key in keys}),
+        MeetingRoom.start_minute.in_({key[2] for key in keys}))
+    ids = {}
+    for meeting_id, room_id, day, start in found:
+        key = (room_id, day, start)
+        if key in keys:
+            if key in ids:
+                raise IntegrityError('importación', None, Exception('reunión duplicada'))
+            ids[key] = meeting_id
+    db.session.execute(insert(MeetingSlot), [
+        {'meeting_id': ids[(data['room_id'], data['date'], data['start_minute'])],
+         'room_id': data['room_id'], 'date': data['date'], 'start_minute': minute}
+        for data in rows for minute in slot_starts(data['start_minute'], data['end_minute'])
+    ])
+
+
+def _commit(rows, created_by, version_names):
+    _bulk_insert(rows, created_by)
+    counters.count_meetings(Counter(data['room_id'] for data in rows))
+    versions.bump(*sorted(set(version_names)))
+    db.session.commit()
+    occupancy.apply([(data['room_id'], data['date'], data['start_minute'], data['end_minute'], True)
+                     for data in rows])
+
+
+def _insert_chunk(chunk, created_by, versions_for, room_plants, report):
+    def names(data):
+        return versions_for(data['room_id'], data['date'], plant_id=room_plants[data['room_id']],
+                            created_by=created_by)
+
+    taken = _occupied(chunk)
+    accepted = []
+    for line, data in chunk:
+        key = (data['room_id'], data['date'])
+        starts = slot_starts(data['start_minute'], data['end_minute'])
+        busy = taken.setdefault(key, set())
+        if busy.intersection(starts):
+            report.error(line, 'La sala ya está ocupada en ese horario')
+            continue
+        # También detecta empalmes entre filas del mismo archivo
+        busy.update(starts)
+        accepted.append((line, data))
+    if not accepted:
+        return
+
+    try:
+        _commit([data for _, data in accepted], created_by,
+                [name for _, data in accepted for name in names(data)])
+    except IntegrityError:
+        # Otra solicitud reservó algo entre la revisión y el commit: se repite
+        # fila por fila para saber cuáles fallan.
+        db.session.rollback()
+        for line, data in accepted:
+            try:
+                _commit([data], created_by, names(data))
+            except IntegrityError:
+                db.session.rollback()
+                report.error(line, 'La sala ya está ocupada en ese horario')
+            else:
+                report.imported += 1
+    else:
+        report.imported += len(accepted)
+
+
+def import_meetings(stream, created_by, versions_for, chunk_size=500):
+    """Importa las reuniones de un CSV en texto y regresa un ImportReport.
+
+    versions_for(room_id, fecha, plant_id=..., created_by=...) regresa los nombres de
+    cache_versions que cambian con una reunión, igual que en las vistas; la
+    planta se toma del mapa de salas para no consultarla por fila.
+    """
+    report = ImportReport()
+    reader = csv.DictReader(stream)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        report.error(1, f"Faltan columnas: {', '.join(missing)}")
+        return report
+
+    room_map = load_room_map()
+    room_plants = dict(room_map.values())
+    form = ImportRowForm(formdata=None, meta={'csrf': False})
+    chunk = []
+    for row in reader:
+        report.rows += 1
+        data, message = validate_row(form, row, room_map)
+        if message:
+            report.error(reader.line_num, message)
+            continue
+        chunk.append((reader.line_num, data))
+        if len(chunk) >= chunk_size:
+            _insert_chunk(chunk, created_by, versions_for, room_plants, report)
+            chunk = []
+    if chunk:
+        _insert_chunk(chunk, created_by, versions_for, room_plants, report)
+    report.errors.sort()
+    return report
@@ -0,0 +1,211 @@
+"""Cola de correos (outbox) con entrega en segundo plano.
+
+send_email() solo inserta en email_outbox, así la solicitud termina sin
+esperar a SMTP. Los workers toman lotes de la tabla, los envían y reintentan
+con espera exponencial; después de MAIL_OUTBOX_MAX_ATTEMPTS el correo queda
+como 'dead' para que un administrador lo revise desde /outbox.
+
+Cada worker conserva una sesión SMTP autenticada (SMTPSession) y la reutiliza
+para todos los correos que procesa, en lugar de abrir una conexión con
+STARTTLS y login por mensaje como hace mail.send().
+"""
+import logging
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from flask_mail import Connection, Message
+
+from models import db, EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# Despierta a los workers de este proceso cuando se encola un correo
+_wakeup = threading.Event()
+_start_lock = threading.Lock()
+
+
+class SMTPSession(object):
+    """Conexión SMTP reutilizable.
+
+    Se abre en el primer envío y se conserva entre lotes; Flask-Mail la
+    renueva cada MAIL_MAX_EMAILS mensajes. Si estuvo inactiva más de
+    MAIL_SMTP_IDLE_SECONDS se cierra, y si el servidor la cortó se reabre
+    una vez antes de reportar el error.
+    """
+
+    def __init__(self, mail_state, idle_seconds):
+        self.mail_state = mail_state
+        self.idle_seconds = idle_seconds
+        self.connection = None
+        self.last_used = 0.0
+        self.connections_opened = 0
+
+    def _open(self):
+        self.connection = Connection(self.mail_state).__enter__()
+        self.connections_opened += 1
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.__exit__(None, None, None)
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.connection = None
+
+    def close_if_idle(self):
+        if self.connection is not None and time.monotonic() - self.last_used > self.idle_seconds:
+            self.close()
+
+    def send(self, message):
+        self.close_if_idle()
+        if self.connection is None:
+            self._open()
+        try:
+            self.connection.send(message)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self.close()
+            self._open()
+            self.connection.send(message)
+        self.last_used = time.monotonic()
+
+
+def open_session(app):
+    return SMTPSession(app.extensions['mail'], app.config['MAIL_SMTP_IDLE_SECONDS'])
+
+
+def enqueue(subject, recipient, body):
+    """Guarda el correo en la cola y confirma la transacción."""
+    db.session.add(EmailOutbox(subject=subject, recipient=recipient, body=body))
+    db.session.commit()
+    _wakeup.set()
+
+
+def _release_stale(now):
+    """Regresa a 'pending' los envíos de un worker que murió a medias."""
+    timeout = timedelta(seconds=current_app.config['MAIL_OUTBOX_LOCK_TIMEOUT'])
+    db.session.query(EmailOutbox).filter(
+        EmailOutbox.status == 'sending',
+        EmailOutbox.locked_at < now - timeout
+    ).update({'status': 'pending', 'locked_at': None}, synchronize_session=False)
+    db.session.commit()
+
+
+def claim_batch():
+    """Reserva hasta MAIL_OUTBOX_BATCH_SIZE correos listos para enviarse.
+
+    El UPDATE condicionado a status='pending' evita que dos workers (o dos
+    procesos) tomen el mismo correo.
+    """
+    now = datetime.utcnow()
+    _release_stale(now)
+    ids = db.session.query(EmailOutbox.id).filter(
+        EmailOutbox.status == 'pending',
+        EmailOutbox.next_attempt_at <= now
+    ).order_by(EmailOutbox.next_attempt_at).limit(current_app.config['MAIL_OUTBOX_BATCH_SIZE']).all()
+
+    claimed = []
+    for (outbox_id,) in ids:
+        updated = db.session.query(EmailOutbox).filter(
+            EmailOutbox.id == outbox_id,
+            EmailOutbox.status == 'pending'
+        ).update({'status': 'sending', 'locked_at': now}, synchronize_session=False)
+        if updated:
+            claimed.append(outbox_id)
+    db.session.commit()
+    if not claimed:
+        return []
+    return db.session.query(EmailOutbox).filter(EmailOutbox.id.in_(claimed)).all()
+
+
+def _mark_failed(item, error):
+    config = current_app.config
+    item.attempts += 1
+    item.locked_at = None
+    item.last_error = str(error)[:500]
+    if item.attempts >= config['MAIL_OUTBOX_MAX_ATTEMPTS']:
+        item.status = 'dead'
+        logger.error("Correo %s descartado tras %d intentos: %s", item.id, item.attempts, error)
+    else:
+        delay = config['MAIL_OUTBOX_BACKOFF_SECONDS'] * 2 ** (item.attempts - 1)
+        item.status = 'pending'
+        item.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        logger.warning("Error al enviar correo %s (intento %d), reintento en %ds: %s",
+                       item.id, item.attempts, delay, error)
+
+
+def deliver(items, smtp):
+    """Envía los correos reservados por la misma sesión SMTP y registra el resultado."""
+    for item in items:
+        try:
+            smtp.send(Message(item.subject, recipients=[item.recipient], body=item.body))
+        except Exception as e:
+            _mark_failed(item, e)
+        else:
+            item.status = 'sent'
+            item.sent_at = datetime.utcnow()
+            item.locked_at = None
+            item.last_error = None
+        db.session.commit()
+
+
+def drain_once(smtp):
+    """Procesa un lote; regresa cuántos correos se intentaron enviar."""
+    items = claim_batch()
+    if items:
+        deliver(items, smtp)
+    return len(items)
+
+
+def run_worker(app, stop_event=None):
+    """Ciclo de un worker: vacía la cola y espera nuevos correos."""
+    stop_event = stop_event or threading.Event()
+    poll = app.config['MAIL_OUTBOX_POLL_SECONDS']
+    smtp = open_session(app)
+    try:
+        while not stop_event.is_set():
+            try:
+                with app.app_context():
+                    processed = drain_once(smtp)
+            except Exception:
+                logger.exception("Error en el worker de correos")
+                processed = 0
+            if not processed:
+                smtp.close_if_idle()
+                _wakeup.wait(poll)
+                _wakeup.clear()
+    finally:
+        smtp.close()
+
+
+def start_workers(app):
+    """Arranca MAIL_OUTBOX_WORKERS hilos daemon en este proceso (una sola vez por aplicación)."""
+    with _start_lock:
+        threads = app.extensions.get('outbox_workers')
+        if threads is not None:
+            return threads
+        threads = []
+        for number in range(app.config['MAIL_OUTBOX_WORKERS']):
+            thread = threading.Thread(target=run_worker, args=(app,),
+                                      name=f'outbox-worker-{number}', daemon=True)
+            thread.start()
+            threads.append(thread)
+        app.extensions['outbox_workers'] = threads
+    if not threads:
+        logger.warning("MAIL_OUTBOX_WORKERS = 0: los correos quedan en cola hasta que corra `flask outbox-worker`")
+    return threads
+
+
+def requeue(outbox_id):
+    """Vuelve a poner en la cola un correo descartado."""
+    item = db.session.get(EmailOutbox, outbox_id)
+    if not item or item.status != 'dead':
+        return False
+    item.status = 'pending'
+    item.attempts = 0
+    item.next_attempt_at = datetime.utcnow()
+    db.session.commit()
+    _wakeup.set()
+    return True
@@ -0,0 +1,216 @@
+"""Actualizaciones de esquema idempotentes.
+
+db.create_all() solo crea tablas nuevas; los cambios sobre tablas existentes
+se aplican aquí. Cada paso revisa el esquema antes de actuar, así que
+upgrade() puede ejecutarse en cada arranque o con `flask upgrade-db`.
+"""
+import logging
+
+from sqlalchemy import MetaData, Table, func, inspect, insert, select, text
+
+import archive
+import counters
+from models import db, MeetingRoom, MeetingSlot, Room
+from slots import parse_slot, slot_starts
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def _columns(conn, table_name):
+    return {column['name'] for column in inspect(conn).get_columns(table_name)}
+
+
+def _drop_index(conn, table_name, index_name):
+    table = Table(table_name, MetaData(), autoload_with=conn)
+    for index in table.indexes:
+        if index.name == index_name:
+            index.drop(conn)
+
+
+class MigrationError(Exception):
+    """El esquema no se puede actualizar sin que alguien revise los datos."""
+
+    def __init__(self, message, details=()):
+        super().__init__(message)
+        self.details = list(details)
+
+
+def _has_rows(conn, table_name):
+    return conn.execute(text(f'SELECT 1 FROM {table_name} LIMIT 1')).first() is not None
+
+
+def _intervals(conn, legacy):
+    """(id, sala, fecha, inicio, fin) de cada reunión, ordenadas por sala y fecha."""
+    conn = conn.execution_options(stream_results=True)
+    if legacy:
+        rows = conn.execute(text('SELECT id, room_id, date, time_slot FROM meeting_rooms '
+                                 'ORDER BY room_id, date, id'))
+        for meeting_id, room_id, day, label in rows:
+            yield (meeting_id, room_id, day) + parse_slot(label)
+    else:
+        yield from conn.execute(text('SELECT id, room_id, date, start_minute, end_minute '
+                                     'FROM meeting_rooms ORDER BY room_id, date, id'))
+
+
+def find_overlaps(conn, legacy=False):
+    """[(reunión, reunión con la que choca, sala, fecha)] que ocupan un mismo bloque.
+
+    Cuando solo se revisaba con un SELECT antes de guardar, dos solicitudes
+    simultáneas podían reservar lo mismo; meeting_slots no se puede llenar
+    mientras existan esas reservaciones dobles.
+    """
+    overlaps = []
+    current_key = None
+    taken = {}
+    for meeting_id, room_id, day, start, end in _intervals(conn, legacy):
+        if (room_id, day) != current_key:
+            current_key = (room_id, day)
+            taken = {}
+        for minute in slot_starts(start, end):
+            other = taken.setdefault(minute, meeting_id)
+            if other != meeting_id:
+                overlaps.append((meeting_id, other, room_id, day))
+                break
+    return overlaps
+
+
+def convert_time_slots(conn):
+    """Convierte meeting_rooms.time_slot ('8:00-8:30') a start_minute/end_minute."""
+    columns = _columns(conn, 'meeting_rooms')
+    if 'start_minute' not in columns:
+        conn.execute(text('ALTER TABLE meeting_rooms ADD COLUMN start_minute INTEGER'))
+        conn.execute(text('ALTER TABLE meeting_rooms ADD COLUMN end_minute INTEGER'))
+
+    # Solo existen tantos valores distintos como horarios en TIME_SLOTS
+    labels = conn.execute(text(
+        'SELECT DISTINCT time_slot FROM meeting_rooms WHERE start_minute IS NULL'
+    )).scalars().all()
+    for label in labels:
+        start, end = parse_slot(label)
+        conn.execute(
+            text('UPDATE meeting_rooms SET start_minute = :start, end_minute = :end '
+                 'WHERE time_slot = :label AND start_minute IS NULL'),
+            {'start': start, 'end': end, 'label': label}
+        )
+
+    _drop_index(conn, 'meeting_rooms', 'uq_meeting_room_date_slot')
+    conn.execute(text('ALTER TABLE meeting_rooms DROP COLUMN time_slot'))
+    if conn.dialect.name == 'mysql':
+        conn.execute(text('ALTER TABLE meeting_rooms '
+                          'MODIFY start_minute INTEGER NOT NULL, '
+                          'MODIFY end_minute INTEGER NOT NULL'))
+    logger.info("meeting_rooms convertida a start_minute/end_minute (%d horarios)", len(labels))
+
+
+def rebuild_meeting_slots(conn):
+    """Regenera meeting_slots a partir del intervalo de cada reunión."""
+    meetings = MeetingRoom.__table__
+    slots = MeetingSlot.__table__
+    conn.execute(slots.delete())
+    last_id = 0
+    while True:
+        chunk = conn.execute(
+            select(meetings.c.id, meetings.c.room_id, meetings.c.date,
+                   meetings.c.start_minute, meetings.c.end_minute)
+            .where(meetings.c.id > last_id).order_by(meetings.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not chunk:
+            break
+        conn.execute(insert(slots), [
+            {'meeting_id': meeting_id, 'room_id': room_id, 'date': day, 'start_minute': minute}
+            for meeting_id, room_id, day, start, end in chunk
+            for minute in slot_starts(start, end)
+        ])
+        last_id = chunk[-1].id
+
+
+def migrate_meetings(rebuild_slots=False):
+    """Convierte time_slot y llena meeting_slots cuando hace falta.
+
+    meeting_slots se regenera si se convirtió la tabla, si se pidió
+    (--rebuild-slots) o si está vacía mientras meeting_rooms tiene filas, así
+    una actualización interrumpida se completa en la siguiente ejecución.
+    Antes de cualquier cambio se buscan reuniones empalmadas; si las hay se
+    detiene con MigrationError sin tocar nada. En SQLite y PostgreSQL la
+    conversión y el llenado son una sola transacción; en MySQL cada ALTER
+    hace commit, y es el llenado pendiente el que se retoma.
+
+    Regresa True si se regeneró meeting_slots.
+    """
+    with db.engine.begin() as conn:
+        legacy = 'time_slot' in _columns(conn, 'meeting_rooms')
+        rebuild = (legacy or rebuild_slots
+                   or (_has_rows(conn, 'meeting_rooms') and not _has_rows(conn, 'meeting_slots')))
+        if not rebuild:
+            return False
+
+        overlaps = find_overlaps(conn, legacy)
+        if overlaps:
+            raise MigrationError(
+                f'{len(overlaps)} reuniones ocupan un horario ya reservado en la misma sala; '
+                'elimínalas o muévelas y vuelve a ejecutar `flask upgrade-db`',
+                [f'Reunión {meeting_id} choca con {other} (sala {room_id}, {day})'
+                 for meeting_id, other, room_id, day in overlaps])
+
+        if legacy:
+            convert_time_slots(conn)
+        rebuild_meeting_slots(conn)
+    return True
+
+
+def add_counters():
+    """Agrega rooms.meeting_count y plants.room_count y los llena.
+
+    Regresa True si hubo que crear alguna columna.
+    """
+    added = False
+    with db.engine.begin() as conn:
+        for table_name, column in (('rooms', 'meeting_count'), ('plants', 'room_count')):
+            if column not in _columns(conn, table_name):
+                conn.execute(text(f'ALTER TABLE {table_name} '
+                                  f'ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0'))
+                added = True
+    if added:
+        counters.recount()
+        logger.info("Contadores de reuniones por sala y salas por planta calculados")
+    return added
+
+
+def _duplicates(conn, index, limit=20):
+    """Valores repetidos que impedirían crear el índice único."""
+    columns = list(index.columns)
+    return conn.execute(select(*columns, func.count()).group_by(*columns)
+                        .having(func.count() > 1).limit(limit)).all()
+
+
+def create_indexes():
+    """create_all no agrega índices a tablas que ya existen.
+
+    Antes de crear un índice único se buscan filas repetidas; si las hay se
+    detiene con MigrationError en lugar de fallar a medias con IntegrityError.
+    """
+    with db.engine.begin() as conn:
+        for table in (Room.__table__, MeetingRoom.__table__, MeetingSlot.__table__):
+            existing = {index['name'] for index in inspect(conn).get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                if index.unique:
+                    duplicates = _duplicates(conn, index)
+                    if duplicates:
+                        columns = [column.name for column in index.columns]
+                        raise MigrationError(
+                            f"No se puede crear {index.name}: {table.name} tiene filas repetidas "
+                            f"en ({', '.join(columns)})",
+                            [', '.join(f'{name}={value}' for name, value in zip(columns, row))
+                             + f' aparece {row[-1]} veces' for row in duplicates])
+                index.create(conn)
+
+
+def upgrade(rebuild_slots=False):
+    migrate_meetings(rebuild_slots)
+    add_counters()
+    create_indexes()
+    archive.partition_table()
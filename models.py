@@ -1,9 +1,11 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+import passwords
+from routing import RoutingSession
+from slots import slot_label
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -17,10 +19,13 @@ class User(UserMixin, db.Model):
     reset_token_expiry = db.Column(db.DateTime, nullable=True)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = passwords.hash_password(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return passwords.verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return passwords.needs_rehash(self.password_hash)
     
     def is_superadmin(self):
         return self.role == 'superadmin'
@@ -39,8 +44,18 @@ class Plant(db.Model):
     description = db.Column(db.String(300), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    # Salas de la planta, mantenido por counters.py
+    room_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     creator = db.relationship('User', backref='plants_created')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None
+        }
     
     def __repr__(self):
         return f"<Plant {self.name}>"
@@ -48,6 +63,10 @@ class Plant(db.Model):
 
 class Room(db.Model):
     __tablename__ = 'rooms'
+    # Listado de salas por planta ordenado por nombre (paginación por llave)
+    __table_args__ = (
+        db.Index('ix_rooms_plant_name', 'plant_id', 'name'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
     description = db.Column(db.String(300))
@@ -55,6 +74,8 @@ class Room(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     plant_id = db.Column(db.Integer, db.ForeignKey('plants.id'), nullable=True)  # <-- FK a Plant
+    # Reuniones de la sala, mantenido por counters.py
+    meeting_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     user = db.relationship('User', backref='rooms_created')
     plant = db.relationship('Plant', backref='rooms')
@@ -65,16 +86,26 @@ class Room(db.Model):
             'name': self.name,
             'description': self.description,
             'capacity': self.capacity,
+            'plant_id': self.plant_id,
             'plant': self.plant.name if self.plant else None,
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None
         }
 
 
 class MeetingRoom(db.Model):
     __tablename__ = 'meeting_rooms'
+    # Índice para ordenar el día y detectar empalmes de intervalos por sala
+    __table_args__ = (
+        db.Index('ix_meeting_room_day_interval', 'room_id', 'date', 'start_minute', 'end_minute'),
+        # Recorridos por rango de fechas (vistas semanal y mensual)
+        db.Index('ix_meeting_rooms_date', 'date', 'room_id'),
+        # "Mis reuniones": las de un usuario en orden de fecha y hora
+        db.Index('ix_meeting_rooms_creator_date', 'created_by', 'date', 'start_minute'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     room_id = db.Column(db.Integer, db.ForeignKey('rooms.id'), nullable=False)
-    time_slot = db.Column(db.String(20), nullable=False)
+    start_minute = db.Column(db.Integer, nullable=False)  # minutos desde medianoche, ej. 480 = 8:00
+    end_minute = db.Column(db.Integer, nullable=False)
     leader = db.Column(db.String(100), nullable=False)
     leader_email = db.Column(db.String(120), nullable=True)
     subject = db.Column(db.String(200), nullable=False)
@@ -85,17 +116,107 @@ class MeetingRoom(db.Model):
     
     user = db.relationship('User', backref='meetings')
     room = db.relationship('Room', backref='meetings')
+    slots = db.relationship('MeetingSlot', back_populates='meeting', cascade='all, delete-orphan')
+
+    @property
+    def time_slot(self):
+        """Horario legible, ej. '8:00-9:30'"""
+        return slot_label(self.start_minute, self.end_minute)
+
+    def book_slots(self, starts):
+        """Ocupa los bloques indicados para la sala y fecha de la reunión."""
+        self.slots = [MeetingSlot(room_id=self.room_id, date=self.date, start_minute=minute)
+                      for minute in starts]
     
     def to_dict(self):
         return {
             'id': self.id,
             'room_id': self.room_id,
             'room_name': self.room.name if self.room else 'N/A',
+            'plant_id': self.room.plant_id if self.room else None,
+            'plant_name': self.room.plant.name if self.room and self.room.plant else None,
             'time_slot': self.time_slot,
+            'start_minute': self.start_minute,
+            'end_minute': self.end_minute,
             'leader': self.leader,
             'leader_email': self.leader_email,
             'subject': self.subject,
             'remarks': self.remarks,
             'date': self.date.strftime('%Y-%m-%d'),
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None
         }
+
+
+class MeetingSlot(db.Model):
+    """Un bloque ocupado por una reunión.
+
+    El índice único (room_id, date, start_minute) hace que la base de datos
+    rechace cualquier empalme, aun entre reservaciones de varios bloques.
+    """
+    __tablename__ = 'meeting_slots'
+    __table_args__ = (
+        db.Index('uq_meeting_slot_room_date_start', 'room_id', 'date', 'start_minute', unique=True),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    meeting_id = db.Column(db.Integer, db.ForeignKey('meeting_rooms.id', ondelete='CASCADE'),
+                           nullable=False, index=True)
+    room_id = db.Column(db.Integer, db.ForeignKey('rooms.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    start_minute = db.Column(db.Integer, nullable=False)
+
+    meeting = db.relationship('MeetingRoom', back_populates='slots')
+
+
+class MeetingArchive(db.Model):
+    """Reuniones pasadas que `flask archive-meetings` sacó de meeting_rooms.
+
+    Conserva el id original. En MySQL la tabla se particiona por mes
+    (RANGE COLUMNS sobre date, ver archive.py); por eso date forma parte de la
+    llave primaria y no hay llaves foráneas, que MySQL no admite en tablas
+    particionadas.
+    """
+    __tablename__ = 'meeting_rooms_archive'
+    __table_args__ = (
+        # Exportación y reportes por rango de fechas
+        db.Index('ix_meeting_archive_date', 'date', 'room_id'),
+        # Revisión antes de borrar una sala
+        db.Index('ix_meeting_archive_room', 'room_id', 'date'),
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    date = db.Column(db.Date, primary_key=True)
+    room_id = db.Column(db.Integer, nullable=False)
+    start_minute = db.Column(db.Integer, nullable=False)
+    end_minute = db.Column(db.Integer, nullable=False)
+    leader = db.Column(db.String(100), nullable=False)
+    leader_email = db.Column(db.String(120), nullable=True)
+    subject = db.Column(db.String(200), nullable=False)
+    remarks = db.Column(db.String(300))
+    created_by = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class EmailOutbox(db.Model):
+    """Correo pendiente de entrega; los workers de mailer.py lo envían por SMTP."""
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next', 'status', 'next_attempt_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(200), nullable=False)
+    recipient = db.Column(db.String(120), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'sending', 'sent' o 'dead'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+
+class CacheVersion(db.Model):
+    """Contador de cambios compartido entre procesos para invalidar cachés locales."""
+    __tablename__ = 'cache_versions'
+    name = db.Column(db.String(120), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
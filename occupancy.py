@@ -0,0 +1,136 @@
+"""Índice de ocupación en memoria.
+
+Para cada fecha se guarda una máscara de bits por sala: el bit i indica que el
+bloque i de la jornada (slots.day_slots()) está ocupado. Cada fecha se carga
+al primer uso con una sola consulta sobre meeting_slots y se valida contra la
+versión 'occupancy:<fecha>' de cache_versions a lo más cada
+OCCUPANCY_VERSION_TTL segundos, así "¿está libre?" (revisión de empalmes al
+reservar) y "¿qué salas están libres?" (búsqueda) son operaciones de bits.
+
+El índice único de meeting_slots sigue siendo la garantía final contra
+empalmes; este índice solo evita consultas en el caso común.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+import versions
+from models import db, MeetingSlot
+from routing import primary
+
+
+def version_name(day):
+    return f'occupancy:{day.isoformat()}'
+
+
+def slot_mask(start_minute, end_minute):
+    """Bits de los bloques que cubre el intervalo [inicio, fin)."""
+    config = current_app.config
+    base, step = config['SCHEDULE_START'], config['SLOT_MINUTES']
+    first = max((start_minute - base) // step, 0)
+    last = -(-(end_minute - base) // step)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+class OccupancyIndex(object):
+
+    def __init__(self):
+        self._days = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load(self, day):
+        # La versión se lee antes que los bloques: si alguien escribe entre
+        # las dos consultas, la siguiente validación detecta el cambio.
+        name = version_name(day)
+        version = versions.current(name)[name]
+        config = current_app.config
+        base, step = config['SCHEDULE_START'], config['SLOT_MINUTES']
+        masks = {}
+        rows = db.session.query(MeetingSlot.room_id, MeetingSlot.start_minute).filter(MeetingSlot.date == day)
+        for room_id, minute in rows:
+            masks[room_id] = masks.get(room_id, 0) | (1 << ((minute - base) // step))
+        return {'version': version, 'checked_at': time.monotonic(), 'masks': masks}
+
+    def _store(self, day, entry):
+        with self._lock:
+            self._days[day] = entry
+            self._days.move_to_end(day)
+            while len(self._days) > current_app.config['OCCUPANCY_MAX_DAYS']:
+                self._days.popitem(last=False)
+
+    def _day(self, day):
+        # Es la revisión de empalmes: nunca se lee de la réplica
+        with primary():
+            return self._current_day(day)
+
+    def _current_day(self, day):
+        with self._lock:
+            entry = self._days.get(day)
+        if entry is not None:
+            if time.monotonic() - entry['checked_at'] < current_app.config['OCCUPANCY_VERSION_TTL']:
+                return entry
+            name = version_name(day)
+            if versions.current(name)[name] == entry['version']:
+                entry['checked_at'] = time.monotonic()
+                return entry
+        entry = self._load(day)
+        self._store(day, entry)
+        return entry
+
+    def mask(self, room_id, day):
+        return self._day(day)['masks'].get(room_id, 0)
+
+    def is_free(self, room_id, day, start_minute, end_minute, ignore=0):
+        """True si ningún bloque del intervalo está ocupado.
+
+        ignore excluye bits propios, p. ej. los de la reunión que se edita.
+        """
+        return not (self.mask(room_id, day) & ~ignore & slot_mask(start_minute, end_minute))
+
+    def free_rooms(self, room_ids, day, start_minute, end_minute):
+        """Las salas de room_ids sin bloques ocupados en el intervalo, en el mismo orden."""
+        wanted = slot_mask(start_minute, end_minute)
+        masks = self._day(day)['masks']
+        return [room_id for room_id in room_ids if not masks.get(room_id, 0) & wanted]
+
+    def apply(self, changes):
+        """Refleja en el índice local una transacción ya confirmada.
+
+        changes es una lista de (room_id, fecha, inicio, fin, ocupado) en
+        orden; la transacción debió incrementar una vez la versión de cada
+        fecha con versions.bump(). Si otro proceso también cambió la fecha,
+        se descarta y se recarga al siguiente uso.
+        """
+        by_day = OrderedDict()
+        for change in changes:
+            by_day.setdefault(change[1], []).append(change)
+        with primary():
+            latest = versions.current(*[version_name(day) for day in by_day])
+        with self._lock:
+            for day, day_changes in by_day.items():
+                entry = self._days.get(day)
+                if entry is None:
+                    continue
+                if latest[version_name(day)] != entry['version'] + 1:
+                    del self._days[day]
+                    continue
+                masks = entry['masks']
+                for room_id, _, start_minute, end_minute, occupied in day_changes:
+                    bits = slot_mask(start_minute, end_minute)
+                    if occupied:
+                        masks[room_id] = masks.get(room_id, 0) | bits
+                    else:
+                        masks[room_id] = masks.get(room_id, 0) & ~bits
+                entry['version'] += 1
+                entry['checked_at'] = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._days.clear()
+
+
+occupancy = OccupancyIndex()
@@ -0,0 +1,94 @@
+"""Paginación por llave (keyset) para los listados.
+
+En lugar de OFFSET, cada página pide las filas que van después de la última
+fila mostrada según columnas de orden que forman una llave única (siempre
+terminan en el id). Así el costo de una página no crece con el número de
+página, y una fila insertada o borrada mientras se navega no duplica ni
+salta registros. El cursor de la siguiente página son los valores de esa
+última fila, en base64 para la URL.
+
+El tamaño de página se toma de ?size= pero siempre se limita a PAGE_SIZE_MAX.
+"""
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import date, datetime
+
+from flask import current_app, request
+from sqlalchemy import and_, or_
+
+Page = namedtuple('Page', 'items next_cursor size')
+
+
+def page_size():
+    """?size= de la URL acotado a [1, PAGE_SIZE_MAX]."""
+    config = current_app.config
+    size = request.args.get('size', type=int) or config['PAGE_SIZE']
+    return max(1, min(size, config['PAGE_SIZE_MAX']))
+
+
+def _encode(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _decode(column, value):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values):
+    data = json.dumps([_encode(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """Valores del cursor convertidos al tipo de cada columna; None si no es válido."""
+    if not cursor:
+        return None
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(data)
+        if not isinstance(values, list) or len(values) != len(columns):
+            return None
+        return [_decode(column, value) for column, value in zip(columns, values)]
+    except (binascii.Error, ValueError, TypeError, OverflowError):
+        return None
+
+
+def after(columns, values):
+    """(a > x) OR (a = x AND b > y) OR ...
+
+    Se escribe expandido en lugar de tuple_(a, b) > (x, y) porque MySQL no
+    siempre usa el índice con comparaciones de tuplas.
+    """
+    terms = []
+    for position, column in enumerate(columns):
+        equal = [columns[n] == values[n] for n in range(position)]
+        terms.append(and_(*equal, column > values[position]))
+    return or_(*terms)
+
+
+def keyset_page(query, columns, cursor=None, size=None):
+    """Una página de query ordenada por columns (ascendente, la última única).
+
+    query debe regresar filas que tengan como atributo el nombre de cada
+    columna (objetos del ORM o filas con esas columnas).
+    """
+    size = size or page_size()
+    values = decode_cursor(cursor, columns)
+    if values is not None:
+        query = query.filter(after(columns, values))
+    rows = query.order_by(*columns).limit(size + 1).all()
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+    return Page(rows, next_cursor, size)
@@ -0,0 +1,59 @@
+"""Hash de contraseñas con método y costo configurables.
+
+PASSWORD_HASH_METHOD usa el formato de Werkzeug, que incluye el costo:
+'scrypt:32768:8:1' (n, r, p) o 'pbkdf2:sha256:600000' (iteraciones). Cada
+hash guardado empieza con los parámetros con los que se generó, así que al
+iniciar sesión se puede saber si quedó con parámetros anteriores y generarlo
+de nuevo con los actuales (needs_rehash).
+
+Calcular un hash es trabajo de CPU de decenas de milisegundos. Con
+PASSWORD_HASH_WORKERS > 0 se ejecuta en un pool de hilos propio: los hilos
+de las solicitudes solo esperan el resultado, y una ola de inicios de sesión
+ocupa a lo más ese número de núcleos en lugar de todos los hilos del worker.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+_executor = None
+_executor_lock = threading.Lock()
+_prefixes = {}
+
+
+def _method():
+    return current_app.config['PASSWORD_HASH_METHOD']
+
+
+def _run(function, *args):
+    """Ejecuta function en el pool de hash, o en este hilo si está desactivado."""
+    global _executor
+    workers = current_app.config['PASSWORD_HASH_WORKERS']
+    if not workers:
+        return function(*args)
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+    return _executor.submit(function, *args).result()
+
+
+def hash_password(password, method=None):
+    return _run(generate_password_hash, password, method or _method())
+
+
+def verify_password(password_hash, password):
+    return _run(check_password_hash, password_hash, password)
+
+
+def _prefix(method):
+    """Parámetros completos que Werkzeug escribe para method ('scrypt' -> 'scrypt:32768:8:1')."""
+    if method not in _prefixes:
+        _prefixes[method] = generate_password_hash('', method).split('$', 1)[0]
+    return _prefixes[method]
+
+
+def needs_rehash(password_hash, method=None):
+    """True si el hash se generó con otro método o costo que el configurado."""
+    return password_hash.split('$', 1)[0] != _prefix(method or _method())
@@ -0,0 +1,148 @@
+"""Perfilado por solicitud, opcional (PROFILING_ENABLED).
+
+Por cada solicitud se mide el tiempo total, el número de sentencias SQL y su
+tiempo (eventos before/after_cursor_execute de cada engine, incluida la
+réplica), el tiempo de render de plantillas y el de send_email. Se regresa en
+la cabecera Server-Timing, que las herramientas de desarrollo del navegador
+muestran en la pestaña de red, y una fracción PROFILING_SAMPLE_RATE de las
+solicitudes (más todas las que tardan PROFILING_SLOW_MS o más) se registra
+como una línea JSON en el logger 'profiling'.
+
+Apagado, init_app() no registra hooks, señales ni eventos; lo único que queda
+es el decorador @timed, que solo revisa si la solicitud tiene perfil.
+
+En respuestas en streaming (exportación CSV) el total se mide hasta que la
+vista regresa la respuesta, no hasta que termina de enviarse el cuerpo.
+"""
+import json
+import logging
+import random
+import time
+from functools import wraps
+
+from flask import (before_render_template, current_app, g, has_request_context, request,
+                   template_rendered)
+from sqlalchemy import event
+
+from models import db
+
+logger = logging.getLogger('profiling')
+
+PROFILE_KEY = '_profile'
+
+
+class Profile(object):
+    __slots__ = ('started', 'sql_count', 'sql_time', 'template_time', 'template_started', 'mail_time')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_started = None
+        self.mail_time = 0.0
+
+
+def current():
+    """Perfil de la solicitud en curso, o None si no hay o está apagado."""
+    if not has_request_context():
+        return None
+    return g.get(PROFILE_KEY)
+
+
+def timed(name):
+    """Suma el tiempo de la función a '<name>_time' del perfil (p. ej. 'mail')."""
+    attribute = f'{name}_time'
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            profile = current()
+            if profile is None:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                setattr(profile, attribute, getattr(profile, attribute) + time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and current() is not None:
+        context._profiling_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_profiling_started', None)
+    profile = current()
+    if started is not None and profile is not None:
+        profile.sql_count += 1
+        profile.sql_time += time.perf_counter() - started
+
+
+def _before_render(sender, template, context, **extra):
+    profile = current()
+    if profile is not None:
+        profile.template_started = time.perf_counter()
+
+
+def _rendered(sender, template, context, **extra):
+    profile = current()
+    if profile is not None and profile.template_started is not None:
+        profile.template_time += time.perf_counter() - profile.template_started
+        profile.template_started = None
+
+
+def _start():
+    g.setdefault(PROFILE_KEY, Profile())
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+def _finish(response):
+    profile = g.pop(PROFILE_KEY, None)
+    if profile is None:
+        return response
+    total = time.perf_counter() - profile.started
+    response.headers.add('Server-Timing', ', '.join([
+        f'total;dur={_ms(total)}',
+        f'db;dur={_ms(profile.sql_time)};desc="{profile.sql_count} consultas"',
+        f'tpl;dur={_ms(profile.template_time)}',
+        f'mail;dur={_ms(profile.mail_time)}',
+    ]))
+
+    config = current_app.config
+    if _ms(total) >= config['PROFILING_SLOW_MS'] or random.random() < config['PROFILING_SAMPLE_RATE']:
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'total_ms': _ms(total),
+            'sql_count': profile.sql_count,
+            'sql_ms': _ms(profile.sql_time),
+            'template_ms': _ms(profile.template_time),
+            'mail_ms': _ms(profile.mail_time),
+        }, separators=(',', ':')))
+    return response
+
+
+def init_app(app):
+    """Registra el perfilado si PROFILING_ENABLED; si no, no hace nada."""
+    if not app.config['PROFILING_ENABLED']:
+        return False
+    # Primero en entrar y último en salir (Flask corre los after_request en
+    # orden inverso), para cubrir los hooks de los blueprints ya registrados
+    app.before_request_funcs.setdefault(None, []).insert(0, _start)
+    app.after_request_funcs.setdefault(None, []).insert(0, _finish)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_rendered, app)
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    return True
@@ -0,0 +1,111 @@
+"""Caché de plantas y salas por proceso.
+
+Plantas y salas cambian pocas veces al mes pero casi todas las vistas las
+necesitan ordenadas por nombre, junto con las opciones de los SelectField.
+Se cargan con dos consultas en copias de solo lectura (no objetos del ORM,
+que quedarían ligados a la sesión de otra solicitud) y se validan contra las
+versiones 'plants' y 'rooms' de cache_versions a lo más cada
+REFDATA_VERSION_TTL segundos, siempre en la base principal. Las vistas que
+modifican plantas o salas incrementan esas versiones y llaman a invalidate()
+para que este proceso recargue en la siguiente solicitud.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+
+import versions
+from models import db, Plant, Room
+from routing import primary
+
+VERSION_NAMES = ('plants', 'rooms')
+
+PlantRef = namedtuple('PlantRef', 'id name description room_count')
+RoomRef = namedtuple('RoomRef', 'id name description capacity plant_id plant')
+
+
+class ReferenceData(object):
+    """Plantas y salas ordenadas por nombre, con índices y opciones de formulario.
+
+    version son las versiones 'plants'/'rooms' con las que se cargó la copia;
+    los ETag de las páginas que la muestran se calculan con ellas y no con las
+    de la base, que pueden ir adelante mientras no venza el TTL.
+    """
+
+    def __init__(self, plants, rooms, version=None):
+        self.version = version or {}
+        self.plants = plants
+        self.rooms = rooms
+        self.plants_by_id = {plant.id: plant for plant in plants}
+        self.rooms_by_id = {room.id: room for room in rooms}
+        self.rooms_by_plant = {}
+        for room in rooms:
+            self.rooms_by_plant.setdefault(room.plant_id, []).append(room)
+        self.plant_choices = [(plant.id, plant.name) for plant in plants]
+        self._room_choices = {None: [self._room_choice(room) for room in rooms]}
+        for plant_id, plant_rooms in self.rooms_by_plant.items():
+            self._room_choices[plant_id] = [self._room_choice(room) for room in plant_rooms]
+
+    @staticmethod
+    def _room_choice(room):
+        return (room.id, f"{room.name} (Cap: {room.capacity})")
+
+    def rooms_in(self, plant_id=None):
+        """Salas de la planta, o todas si plant_id es None."""
+        if plant_id is None:
+            return self.rooms
+        return self.rooms_by_plant.get(plant_id, [])
+
+    def room_choices(self, plant_id=None):
+        if plant_id is None:
+            return self._room_choices[None]
+        return self._room_choices.get(plant_id, [])
+
+    @property
+    def first_plant_id(self):
+        return self.plants[0].id if self.plants else None
+
+
+def load(version=None):
+    plants = [PlantRef(*row) for row in
+              db.session.query(Plant.id, Plant.name, Plant.description, Plant.room_count)
+              .order_by(Plant.name)]
+    plants_by_id = {plant.id: plant for plant in plants}
+    rooms = [RoomRef(room_id, name, description, capacity, plant_id, plants_by_id.get(plant_id))
+             for room_id, name, description, capacity, plant_id in
+             db.session.query(Room.id, Room.name, Room.description, Room.capacity, Room.plant_id)
+             .order_by(Room.name)]
+    return ReferenceData(plants, rooms, version)
+
+
+class ReferenceCache(object):
+
+    def __init__(self):
+        self._data = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """ReferenceData vigente; solo consulta la base si venció el TTL."""
+        data = self._data
+        if data is not None and time.monotonic() - self._checked_at < current_app.config['REFDATA_VERSION_TTL']:
+            return data
+        with self._lock, primary():
+            version = versions.current(*VERSION_NAMES)
+            if self._data is None or version != self._version:
+                # La versión se lee antes que los datos: un cambio intermedio
+                # se detecta en la siguiente validación.
+                self._data = load(version)
+                self._version = version
+            self._checked_at = time.monotonic()
+            return self._data
+
+    def invalidate(self):
+        with self._lock:
+            self._data = None
+            self._version = None
+
+
+reference = ReferenceCache()
@@ -0,0 +1,78 @@
+"""Lecturas desde una réplica de MySQL.
+
+Si SQLALCHEMY_BINDS tiene una conexión 'replica', las vistas GET marcadas
+con @replica_reads ejecutan sus SELECT en ella; todo lo demás (POST,
+escrituras, revisiones de empalmes y las cachés compartidas del proceso)
+sigue en la base principal.
+
+Después de un commit la sesión del navegador queda "pegada" a la principal
+REPLICA_STICKY_SECONDS segundos, así quien acaba de reservar ve su reunión
+aunque la réplica todavía no la tenga.
+"""
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql import Select
+
+REPLICA_BIND = 'replica'
+STICKY_KEY = 'primary_until'
+
+
+def replica_reads(view):
+    """Marca una vista de solo lectura; va justo debajo de @bp.route."""
+    view.replica_reads = True
+    return view
+
+
+def use_replica():
+    return has_app_context() and g.get('use_replica', False)
+
+
+@contextmanager
+def primary():
+    """Fuerza la base principal, p. ej. al llenar cachés compartidas."""
+    previous = g.get('use_replica', False) if has_app_context() else False
+    if has_app_context():
+        g.use_replica = False
+    try:
+        yield
+    finally:
+        if has_app_context():
+            g.use_replica = previous
+
+
+class RoutingSession(Session):
+    """Manda los SELECT a la réplica cuando la solicitud lo permite."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and isinstance(clause, Select)
+                and use_replica() and REPLICA_BIND in self._db.engines):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _remember_write(db_session):
+    if has_request_context():
+        g.db_wrote = True
+
+
+def choose_database():
+    """before_request: decide si esta solicitud lee de la réplica."""
+    view = current_app.view_functions.get(request.endpoint)
+    g.use_replica = (
+        REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {})
+        and request.method in ('GET', 'HEAD')
+        and getattr(view, 'replica_reads', False)
+        and session.get(STICKY_KEY, 0) < time.time()
+    )
+
+
+def stick_after_write(response):
+    """after_request: tras un commit, leer de la principal por un rato."""
+    if g.get('db_wrote'):
+        session[STICKY_KEY] = time.time() + current_app.config['REPLICA_STICKY_SECONDS']
+    return response
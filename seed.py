@@ -0,0 +1,68 @@
+"""Datos iniciales: superadmin y plantas 'Planta 1' a 'Planta 10'.
+
+Se ejecuta con `flask seed` (después de `flask upgrade-db`) y no al importar
+la aplicación, así los workers arrancan sin tocar la base de datos. Es
+idempotente: las plantas se insertan con un solo INSERT que ignora las que
+ya existen, y la contraseña del superadmin solo se calcula si falta.
+"""
+from sqlalchemy import func, or_, select
+
+import versions
+from models import db, Plant, User
+
+SUPERADMIN = {'username': 'superadmin', 'email': 'salaswasion@gmail.com', 'role': 'superadmin'}
+SUPERADMIN_PASSWORD = 'admin123'
+PLANT_COUNT = 10
+
+
+def _insert_missing(table, rows, unique_column):
+    """INSERT de varias filas que omite las que chocan con un índice único.
+
+    Regresa cuántas filas se agregaron, contando la tabla antes y después: en
+    MySQL el rowcount de ON DUPLICATE KEY UPDATE también cuenta las que ya
+    existían.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        column = table.c[unique_column]
+        statement = insert(table).values(rows).on_duplicate_key_update({unique_column: column})
+    elif dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table).values(rows).on_conflict_do_nothing()
+    else:
+        existing = {value for (value,) in db.session.execute(
+            table.select().with_only_columns(table.c[unique_column]))}
+        rows = [row for row in rows if row[unique_column] not in existing]
+        if not rows:
+            return 0
+        statement = table.insert().values(rows)
+    count = select(func.count()).select_from(table)
+    before = db.session.execute(count).scalar()
+    db.session.execute(statement)
+    return db.session.execute(count).scalar() - before
+
+
+def seed():
+    """Crea lo que falte; regresa (superadmin_creado, plantas_nuevas)."""
+    admin_id = db.session.query(User.id).filter(
+        or_(User.username == SUPERADMIN['username'], User.email == SUPERADMIN['email'])
+    ).scalar()
+    created_admin = admin_id is None
+    if created_admin:
+        admin = User(**SUPERADMIN)
+        admin.set_password(SUPERADMIN_PASSWORD)
+        db.session.add(admin)
+        db.session.flush()
+        admin_id = admin.id
+
+    plants = [{'name': f'Planta {number}', 'description': f'Planta {number}', 'created_by': admin_id}
+              for number in range(1, PLANT_COUNT + 1)]
+    inserted = _insert_missing(Plant.__table__, plants, 'name')
+    if inserted:
+        versions.bump('plants')
+    db.session.commit()
+    return created_admin, inserted
@@ -0,0 +1,46 @@
+"""Horarios de reservación.
+
+Los horarios se guardan como minutos desde la medianoche (8:00 -> 480) para
+poder ordenarlos y compararlos como intervalos. La jornada y la duración de
+cada bloque se configuran con SCHEDULE_START, SCHEDULE_END y SLOT_MINUTES.
+"""
+from flask import current_app
+
+
+def format_minute(minute):
+    """480 -> '8:00'"""
+    return f"{minute // 60}:{minute % 60:02d}"
+
+
+def slot_label(start_minute, end_minute):
+    """(480, 510) -> '8:00-8:30'"""
+    return f"{format_minute(start_minute)}-{format_minute(end_minute)}"
+
+
+def parse_time(value):
+    """'8:00' -> 480"""
+    hours, minutes = value.strip().split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def parse_slot(label):
+    """'8:00-8:30' -> (480, 510)"""
+    start, end = label.split('-')
+    return parse_time(start), parse_time(end)
+
+
+def slot_minutes():
+    return current_app.config['SLOT_MINUTES']
+
+
+def day_slots():
+    """Bloques de la jornada como [(inicio, fin), ...] en minutos."""
+    config = current_app.config
+    step = config['SLOT_MINUTES']
+    return [(minute, minute + step)
+            for minute in range(config['SCHEDULE_START'], config['SCHEDULE_END'], step)]
+
+
+def slot_starts(start_minute, end_minute):
+    """Inicio de cada bloque que cubre el intervalo [inicio, fin)."""
+    return list(range(start_minute, end_minute, slot_minutes()))
@@ -0,0 +1,98 @@
+"""Aplicación de prueba sobre un archivo SQLite nuevo por prueba.
+
+Las cachés por proceso (plantas y salas, identidades, ocupación y
+calendarios) se vacían entre pruebas: cada base nueva empieza sus versiones
+en 0 y la caché de la prueba anterior parecería vigente.
+"""
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from app import create_app  # noqa: E402
+from ics import feeds  # noqa: E402
+from identity import identities  # noqa: E402
+from models import db, Plant, Room  # noqa: E402
+from occupancy import occupancy  # noqa: E402
+from refdata import reference  # noqa: E402
+from seed import SUPERADMIN, SUPERADMIN_PASSWORD  # noqa: E402
+
+
+class TestConfig(config.DevelopmentConfig):
+    TESTING = True
+    DEBUG = False
+    WTF_CSRF_ENABLED = False
+    MAIL_SUPPRESS_SEND = True
+    MAIL_OUTBOX_WORKERS = 0
+    # Hash barato: las pruebas inician sesión muchas veces
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PASSWORD_HASH_WORKERS = 0
+    # Varios hilos escriben a la vez; SQLite espera el candado en lugar de fallar
+    SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}}
+
+
+def _clear_caches():
+    reference.invalidate()
+    identities.clear()
+    occupancy.clear()
+    feeds.clear()
+
+
+@pytest.fixture
+def app(tmp_path):
+    _clear_caches()
+    test_config = type('TestConfig', (TestConfig,), {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+    })
+    app = create_app(test_config)
+    runner = app.test_cli_runner()
+    for command in ('upgrade-db', 'seed'):
+        result = runner.invoke(args=[command])
+        assert result.exit_code == 0, result.output
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+    _clear_caches()
+
+
+def login(app):
+    client = app.test_client()
+    response = client.post('/login', data={'email': SUPERADMIN['email'], 'password': SUPERADMIN_PASSWORD})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def client(app):
+    return login(app)
+
+
+@pytest.fixture
+def room(app):
+    """(planta, sala) recién creadas."""
+    with app.app_context():
+        plant = db.session.query(Plant).order_by(Plant.id).first()
+        room = Room(name='Sala de pruebas', capacity=8, plant_id=plant.id)
+        db.session.add(room)
+        db.session.commit()
+        return plant.id, room.id
+
+
+def booking(plant_id, room_id, start=540, end=570, day=None, **extra):
+    data = {
+        'date': (day or date.today() + timedelta(days=3)).isoformat(),
+        'plant_id': plant_id,
+        'room_id': room_id,
+        'start_minute': start,
+        'end_minute': end,
+        'leader': 'Líder',
+        'leader_email': 'lider@example.com',
+        'subject': f'Reunión {start}',
+        'remarks': '',
+    }
+    data.update(extra)
+    return data
@@ -0,0 +1,77 @@
+"""Archivo de reuniones pasadas."""
+from datetime import date, datetime, timedelta
+
+import archive
+import counters
+from app import meeting_versions
+from models import db, MeetingArchive, MeetingRoom, MeetingSlot, Room, User
+from slots import slot_starts
+
+TODAY = date.today()
+
+
+def past_meeting(app, room_id, days_ago, subject, start=540, end=600):
+    """Reunión pasada insertada directamente: el formulario no acepta fechas pasadas."""
+    with app.app_context():
+        user = db.session.query(User).first()
+        meeting = MeetingRoom(room_id=room_id, date=TODAY - timedelta(days=days_ago),
+                              start_minute=start, end_minute=end, leader='Líder',
+                              leader_email='lider@example.com', subject=subject,
+                              created_by=user.id, created_at=datetime.utcnow())
+        meeting.book_slots(slot_starts(start, end))
+        db.session.add(meeting)
+        counters.count_meetings({room_id: 1})
+        db.session.commit()
+        return meeting.id
+
+
+def run_archive(app, before=TODAY, batch_size=100):
+    with app.app_context():
+        return archive.archive_meetings(before, batch_size, meeting_versions)
+
+
+def test_meeting_moved_to_the_future_during_a_batch_stays_live(app, room, monkeypatch):
+    _, room_id = room
+    kept_id = past_meeting(app, room_id, 10, 'Se mueve')
+    moved_id = past_meeting(app, room_id, 9, 'Se archiva')
+    future = TODAY + timedelta(days=5)
+
+    def edit_between_reads(days):
+        # Otra solicitud edita la reunión entre la primera lectura y la copia
+        db.session.query(MeetingRoom).filter_by(id=kept_id).update({'date': future})
+        db.session.query(MeetingSlot).filter_by(meeting_id=kept_id).update({'date': future})
+        db.session.commit()
+        return []
+    monkeypatch.setattr(archive, 'ensure_partitions', edit_between_reads)
+
+    assert run_archive(app) == 1
+    with app.app_context():
+        assert [m.id for m in db.session.query(MeetingArchive)] == [moved_id]
+        kept = db.session.get(MeetingRoom, kept_id)
+        assert kept.date == future
+        assert len(kept.slots) == 2
+
+
+def test_archive_moves_past_meetings_and_export_still_lists_them(app, client, room):
+    plant_id, room_id = room
+    old_id = past_meeting(app, room_id, 40, 'Archivada')
+    recent_id = past_meeting(app, room_id, 1, 'Reciente')
+
+    result = app.test_cli_runner().invoke(args=['archive-meetings', '--days', '30'])
+    assert result.exit_code == 0, result.output
+    assert '1 reuniones anteriores' in result.output
+    with app.app_context():
+        assert db.session.get(MeetingRoom, old_id) is None
+        assert db.session.query(MeetingSlot).filter_by(meeting_id=old_id).count() == 0
+        assert db.session.query(MeetingArchive).filter_by(id=old_id).one().subject == 'Archivada'
+        assert db.session.get(MeetingRoom, recent_id) is not None
+        # Archivar no cambia el conteo de reuniones de la sala
+        assert db.session.get(Room, room_id).meeting_count == 2
+
+    response = client.get('/meetings/export', query_string={
+        'start': (TODAY - timedelta(days=60)).isoformat(), 'end': TODAY.isoformat(), 'plant': plant_id})
+    lines = response.get_data(as_text=True).lstrip('\ufeff').splitlines()
+    assert [line.split(',')[8] for line in lines[1:]] == ['Archivada', 'Reciente']
+
+    # Una segunda corrida no encuentra nada más que mover
+    assert '0 reuniones anteriores' in app.test_cli_runner().invoke(args=['archive-meetings', '--days', '30']).output
@@ -0,0 +1,46 @@
+"""Reservaciones simultáneas del mismo horario: solo una debe quedar."""
+import threading
+
+from models import db, MeetingRoom, MeetingSlot
+
+from conftest import booking, login
+
+PARALLEL = 8
+
+
+def test_parallel_bookings_for_one_slot_keep_one(app, room):
+    plant_id, room_id = room
+    clients = [login(app) for _ in range(PARALLEL)]
+    barrier = threading.Barrier(PARALLEL)
+    responses = []
+    errors = []
+
+    def book(client):
+        try:
+            barrier.wait()
+            responses.append(client.post('/add', data=booking(plant_id, room_id)))
+        except Exception as e:  # pragma: no cover - se reporta abajo
+            errors.append(e)
+
+    threads = [threading.Thread(target=book, args=(client,)) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200] * (PARALLEL - 1) + [302]
+    with app.app_context():
+        assert db.session.query(MeetingRoom).count() == 1
+        assert db.session.query(MeetingSlot).count() == 1
+
+
+def test_overlapping_multi_slot_booking_is_rejected(app, client, room):
+    plant_id, room_id = room
+    assert client.post('/add', data=booking(plant_id, room_id, 540, 630)).status_code == 302
+    response = client.post('/add', data=booking(plant_id, room_id, 600, 660))
+    assert response.status_code == 200
+    assert 'Ya existe una reunión reservada' in response.get_data(as_text=True)
+    with app.app_context():
+        assert db.session.query(MeetingRoom).count() == 1
@@ -0,0 +1,48 @@
+"""ETag de páginas armadas con la copia en memoria de plantas y salas y del listado de salas."""
+import versions
+from models import db, Room
+
+from conftest import booking
+
+
+def rename_elsewhere(app, room_id, name):
+    """Lo que haría otro worker: cambia la sala e incrementa 'rooms' sin avisar a este proceso."""
+    with app.app_context():
+        db.session.get(Room, room_id).name = name
+        versions.bump('rooms')
+        db.session.commit()
+
+
+def test_etag_follows_the_snapshot_not_the_database(app, client, room):
+    _, room_id = room
+    app.config['REFDATA_VERSION_TTL'] = 3600
+    first = client.get('/')
+    assert 'Sala de pruebas' in first.get_data(as_text=True)
+
+    rename_elsewhere(app, room_id, 'Sala renombrada')
+
+    # Dentro del TTL el cuerpo sigue viejo, y el ETag también
+    stale = client.get('/')
+    assert 'Sala renombrada' not in stale.get_data(as_text=True)
+    assert stale.headers['ETag'] == first.headers['ETag']
+
+    # Al vencer el TTL, el ETag que tenía el navegador ya no sirve
+    app.config['REFDATA_VERSION_TTL'] = 0
+    fresh = client.get('/', headers={'If-None-Match': stale.headers['ETag']})
+    assert fresh.status_code == 200
+    assert 'Sala renombrada' in fresh.get_data(as_text=True)
+    assert fresh.headers['ETag'] != stale.headers['ETag']
+
+
+def test_rooms_list_revalidates_with_meeting_counts(client, room):
+    plant_id, room_id = room
+    first = client.get('/rooms')
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    etag = first.headers['ETag']
+    assert client.get('/rooms', headers={'If-None-Match': etag}).status_code == 304
+
+    # Una reservación solo cambia meeting_count, no 'rooms'
+    assert client.post('/add', data=booking(plant_id, room_id)).status_code == 302
+    second = client.get('/rooms', headers={'If-None-Match': etag})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != etag
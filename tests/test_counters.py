@@ -0,0 +1,55 @@
+"""Contadores desnormalizados: reuniones por sala y salas por planta."""
+import counters
+from models import db, MeetingRoom, Plant, Room
+
+from conftest import booking
+
+
+def add_room(client, name, plant_id):
+    response = client.post('/rooms/add', data={'name': name, 'description': '', 'capacity': 6, 'plant_id': plant_id})
+    assert response.status_code == 302
+
+
+def snapshot(app):
+    with app.app_context():
+        rooms = {name: count for name, count in db.session.query(Room.name, Room.meeting_count)}
+        plants = {plant_id: count for plant_id, count in db.session.query(Plant.id, Plant.room_count)}
+        return rooms, plants
+
+
+def test_counters_follow_every_change_and_match_a_recount(app, client):
+    with app.app_context():
+        first_plant, second_plant = [plant.id for plant in db.session.query(Plant).order_by(Plant.id).limit(2)]
+    add_room(client, 'Sala A', first_plant)
+    add_room(client, 'Sala B', first_plant)
+    with app.app_context():
+        room_a, room_b = [room.id for room in db.session.query(Room).order_by(Room.name)]
+
+    for start in (540, 600):
+        assert client.post('/add', data=booking(first_plant, room_a, start=start, end=start + 30)).status_code == 302
+    with app.app_context():
+        moved, deleted = [m.id for m in db.session.query(MeetingRoom).order_by(MeetingRoom.start_minute)]
+    # Editar una reunión a otra sala mueve su conteo
+    assert client.post(f'/edit/{moved}', data=booking(first_plant, room_b, start=540, end=570)).status_code == 302
+    assert client.post(f'/delete/{deleted}').status_code == 302
+    rooms, plants = snapshot(app)
+    assert (rooms['Sala A'], rooms['Sala B']) == (0, 1)
+    assert (plants[first_plant], plants[second_plant]) == (2, 0)
+
+    # Mover una sala de planta
+    response = client.post(f'/rooms/edit/{room_b}', data={'name': 'Sala B', 'description': '', 'capacity': 6,
+                                                          'plant_id': second_plant})
+    assert response.status_code == 302
+    rooms, plants = snapshot(app)
+    assert (plants[first_plant], plants[second_plant]) == (1, 1)
+
+    # Con reuniones la sala no se borra; sin ellas sí, y descuenta de su planta
+    client.post(f'/rooms/delete/{room_b}')
+    client.post(f'/rooms/delete/{room_a}')
+    rooms, plants = snapshot(app)
+    assert set(rooms) == {'Sala B'}
+    assert (plants[first_plant], plants[second_plant]) == (0, 1)
+
+    with app.app_context():
+        counters.recount()
+    assert snapshot(app) == (rooms, plants)
@@ -0,0 +1,57 @@
+"""La vista del día no debe volver a cargar sala y planta reunión por reunión."""
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from models import db, MeetingRoom, Room
+
+DAY = date.today() + timedelta(days=3)
+
+
+def add_meetings(app, plant_id, count):
+    """count reuniones en salas distintas, sin pasar por el formulario."""
+    with app.app_context():
+        for number in range(count):
+            room = Room(name=f'Sala {count}-{number}', capacity=6, plant_id=plant_id)
+            db.session.add(room)
+            db.session.flush()
+            meeting = MeetingRoom(room_id=room.id, date=DAY, start_minute=540 + 30 * (number % 10),
+                                  end_minute=570 + 30 * (number % 10), leader='Líder',
+                                  subject=f'Reunión {number}', created_by=1)
+            meeting.book_slots([meeting.start_minute])
+            db.session.add(meeting)
+        db.session.commit()
+
+
+def statements_for(app, client, url):
+    with app.app_context():
+        engine = db.engine
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # Primera carga: llena las cachés del proceso; se mide la segunda
+    assert client.get(url).status_code == 200
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    assert response.status_code == 200
+    return statements, response.get_data(as_text=True)
+
+
+def test_day_view_query_count_does_not_grow_with_meetings(app, client, room):
+    plant_id, _ = room
+    url = f'/?date={DAY.isoformat()}'
+
+    add_meetings(app, plant_id, 1)
+    one, html = statements_for(app, client, url)
+    assert 'Reunión 0' in html
+
+    add_meetings(app, plant_id, 20)
+    many, html = statements_for(app, client, url)
+    assert 'Reunión 19' in html
+
+    assert len(many) == len(one), many
@@ -0,0 +1,18 @@
+"""Los eventos del calendario van en UTC, sin TZID ni VTIMEZONE."""
+from datetime import date, datetime
+from types import SimpleNamespace
+
+from ics import build_calendar
+
+
+def test_events_are_in_utc():
+    meeting = SimpleNamespace(id=7, date=date(2026, 3, 2), start_minute=9 * 60, end_minute=10 * 60 + 30,
+                              subject='Revisión', leader='Líder', leader_email='lider@example.com',
+                              remarks='', created_at=datetime(2026, 3, 1, 12, 0), room_name='Sala 1',
+                              plant_name='Planta 1')
+    text = build_calendar('Sala 1', 'America/Mexico_City', [meeting], 'salas.example')
+
+    assert 'TZID' not in text
+    # Ciudad de México es UTC-6 todo el año
+    assert 'DTSTART:20260302T150000Z\r\n' in text
+    assert 'DTEND:20260302T163000Z\r\n' in text
@@ -0,0 +1,28 @@
+"""Importación de reservaciones desde CSV."""
+from datetime import date, timedelta
+
+from models import db, MeetingRoom, Room
+from seed import SUPERADMIN
+
+
+def import_csv(app, tmp_path, rows):
+    day = (date.today() + timedelta(days=3)).isoformat()
+    lines = ['sala,fecha,inicio,fin,lider,correo_lider,asunto,observaciones']
+    lines += [f'{room},{day},{start},{end},Líder,lider@example.com,Revisión,' for room, start, end in rows]
+    path = tmp_path / 'reuniones.csv'
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return app.test_cli_runner().invoke(args=['import-meetings', str(path), '--user', SUPERADMIN['email']])
+
+
+def test_imports_rooms_with_and_without_plant(app, tmp_path, room):
+    with app.app_context():
+        db.session.add(Room(name='Sala sin planta', capacity=4, plant_id=None))
+        db.session.commit()
+
+    result = import_csv(app, tmp_path, [('Sala de pruebas', '9:00', '10:00'),
+                                        ('Sala sin planta', '9:00', '10:00'),
+                                        ('Sala sin planta', '9:30', '11:00')])
+    assert '2 reuniones importadas de 3 filas, 1 con errores' in result.output
+    assert 'Línea 4: La sala ya está ocupada en ese horario' in result.output
+    with app.app_context():
+        assert db.session.query(MeetingRoom).count() == 2
@@ -0,0 +1,57 @@
+"""El índice de ocupación en memoria no debe rechazar reservaciones válidas."""
+import versions
+from models import db, MeetingRoom, MeetingSlot
+from occupancy import version_name
+
+from conftest import booking
+
+
+def delete_elsewhere(app, meeting_id):
+    """Lo que haría otro worker: borra la reunión sin avisar al índice de este proceso."""
+    with app.app_context():
+        meeting = db.session.get(MeetingRoom, meeting_id)
+        db.session.query(MeetingSlot).filter_by(meeting_id=meeting_id).delete()
+        db.session.delete(meeting)
+        versions.bump(version_name(meeting.date))
+        db.session.commit()
+
+
+def only_meeting(app):
+    with app.app_context():
+        return db.session.query(MeetingRoom).one()
+
+
+def test_stale_busy_mask_is_confirmed_before_rejecting(app, client, room):
+    plant_id, room_id = room
+    app.config['OCCUPANCY_VERSION_TTL'] = 3600
+    assert client.post('/add', data=booking(plant_id, room_id)).status_code == 302
+    delete_elsewhere(app, only_meeting(app).id)
+
+    response = client.post('/add', data=booking(plant_id, room_id, subject='Otra'))
+    assert response.status_code == 302
+    assert only_meeting(app).subject == 'Otra'
+
+
+def test_stale_busy_mask_does_not_block_edits(app, client, room):
+    plant_id, room_id = room
+    app.config['OCCUPANCY_VERSION_TTL'] = 3600
+    assert client.post('/add', data=booking(plant_id, room_id, start=540, end=570)).status_code == 302
+    assert client.post('/add', data=booking(plant_id, room_id, start=600, end=630)).status_code == 302
+    with app.app_context():
+        first, second = db.session.query(MeetingRoom).order_by(MeetingRoom.start_minute).all()
+        first_id, second_id = first.id, second.id
+    delete_elsewhere(app, first_id)
+
+    response = client.post(f'/edit/{second_id}', data=booking(plant_id, room_id, start=540, end=570))
+    assert response.status_code == 302
+    assert only_meeting(app).start_minute == 540
+
+
+def test_real_conflict_is_still_rejected(app, client, room):
+    plant_id, room_id = room
+    assert client.post('/add', data=booking(plant_id, room_id, subject='Primera')).status_code == 302
+
+    response = client.post('/add', data=booking(plant_id, room_id, subject='Segunda'))
+    assert response.status_code == 200
+    assert 'Primera' in response.get_data(as_text=True)
+    assert only_meeting(app).subject == 'Primera'
@@ -0,0 +1,117 @@
+"""Cola de correos: acceso, arranque de los workers, reintentos y descarte."""
+import smtplib
+from datetime import datetime, timedelta
+
+import mailer
+from models import db, EmailOutbox, User
+
+
+def add_user(app, role):
+    with app.app_context():
+        user = User(username=f'{role}-prueba', email=f'{role}@example.com', role=role)
+        user.set_password('secreto-123')
+        db.session.add(user)
+        db.session.commit()
+
+
+def login_as(app, role):
+    client = app.test_client()
+    response = client.post('/login', data={'email': f'{role}@example.com', 'password': 'secreto-123'})
+    assert response.status_code == 302
+    return client
+
+
+def test_admins_can_see_the_outbox(app):
+    add_user(app, 'admin')
+    add_user(app, 'user')
+    assert login_as(app, 'admin').get('/outbox').status_code == 200
+    assert login_as(app, 'user').get('/outbox').status_code == 302
+
+
+def test_workers_start_with_the_first_request_only(app, monkeypatch):
+    started = []
+    monkeypatch.setattr(mailer, 'run_worker', lambda app, stop_event=None: started.append(app))
+    app.config['MAIL_OUTBOX_WORKERS'] = 2
+
+    assert app.test_cli_runner().invoke(args=['seed']).exit_code == 0
+    assert 'outbox_workers' not in app.extensions
+
+    client = app.test_client()
+    client.get('/login')
+    client.get('/login')
+    for thread in app.extensions['outbox_workers']:
+        thread.join()
+    assert started == [app, app]
+
+
+class FailingSMTP(object):
+    """Sesión SMTP que rechaza todos los envíos."""
+
+    def __init__(self):
+        self.attempts = 0
+
+    def send(self, message):
+        self.attempts += 1
+        raise smtplib.SMTPRecipientsRefused({message.recipients[0]: (550, b'no existe')})
+
+
+class RecordingSMTP(object):
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message.recipients[0])
+
+
+def make_due(item_id):
+    db.session.query(EmailOutbox).filter_by(id=item_id).update({'next_attempt_at': datetime.utcnow()})
+    db.session.commit()
+
+
+def test_failures_back_off_exponentially_then_go_dead(app):
+    app.config.update(MAIL_OUTBOX_MAX_ATTEMPTS=3, MAIL_OUTBOX_BACKOFF_SECONDS=30)
+    smtp = FailingSMTP()
+    with app.app_context():
+        mailer.enqueue('Asunto', 'nadie@example.com', 'Cuerpo')
+        item_id = db.session.query(EmailOutbox.id).scalar()
+
+        for attempt, delay in ((1, 30), (2, 60)):
+            started = datetime.utcnow()
+            assert mailer.drain_once(smtp) == 1
+            item = db.session.get(EmailOutbox, item_id)
+            assert (item.status, item.attempts, item.locked_at) == ('pending', attempt, None)
+            assert '550' in item.last_error
+            waited = item.next_attempt_at - started
+            assert timedelta(seconds=delay - 1) <= waited <= timedelta(seconds=delay + 5)
+            # No se vuelve a tomar antes de su hora
+            assert mailer.claim_batch() == []
+            make_due(item_id)
+
+        assert mailer.drain_once(smtp) == 1
+        item = db.session.get(EmailOutbox, item_id)
+        assert (item.status, item.attempts) == ('dead', 3)
+        make_due(item_id)
+        assert mailer.drain_once(smtp) == 0
+        assert smtp.attempts == 3
+
+        assert mailer.requeue(item_id)
+        item = db.session.get(EmailOutbox, item_id)
+        assert (item.status, item.attempts) == ('pending', 0)
+        recording = RecordingSMTP()
+        assert mailer.drain_once(recording) == 1
+        assert recording.sent == ['nadie@example.com']
+        assert db.session.get(EmailOutbox, item_id).status == 'sent'
+
+
+def test_stale_sending_lock_is_released(app):
+    with app.app_context():
+        mailer.enqueue('Asunto', 'alguien@example.com', 'Cuerpo')
+        assert len(mailer.claim_batch()) == 1
+        # Otro worker no lo toma mientras el candado está vigente
+        assert mailer.claim_batch() == []
+
+        stale = datetime.utcnow() - timedelta(seconds=app.config['MAIL_OUTBOX_LOCK_TIMEOUT'] + 1)
+        db.session.query(EmailOutbox).update({'locked_at': stale})
+        db.session.commit()
+        assert len(mailer.claim_batch()) == 1
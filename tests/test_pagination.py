@@ -0,0 +1,54 @@
+"""Paginación por llave (keyset) de los listados."""
+import base64
+import html
+import re
+
+import pytest
+
+from conftest import booking
+
+NEXT_LINK = re.compile(r'href="([^"]*)" class="btn btn-secondary">Siguiente')
+
+
+def cursor_for(raw):
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def subjects(response):
+    return re.findall(r'Reunión \d+', response.get_data(as_text=True))
+
+
+def test_pages_cover_every_row_once_in_order(client, room):
+    plant_id, room_id = room
+    starts = [540, 570, 600, 630, 660]
+    for start in reversed(starts):
+        assert client.post('/add', data=booking(plant_id, room_id, start=start, end=start + 30)).status_code == 302
+
+    seen = []
+    url = '/meetings/mine?size=2'
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        page = subjects(response)
+        assert len(page) <= 2
+        seen.extend(page)
+        link = NEXT_LINK.search(response.get_data(as_text=True))
+        url = html.unescape(link.group(1)) if link else None
+    assert seen == [f'Reunión {start}' for start in starts]
+
+
+@pytest.mark.parametrize('cursor', [
+    'no-es-base64!',
+    cursor_for('{"no": "lista"}'),
+    cursor_for('["2026-01-01", 540]'),
+    cursor_for('["no-es-fecha", 540, 1]'),
+    cursor_for('["2026-01-01", 1e400, 1]'),
+    cursor_for('["2026-01-01", [540], 1]'),
+])
+def test_bad_cursor_falls_back_to_the_first_page(client, room, cursor):
+    plant_id, room_id = room
+    assert client.post('/add', data=booking(plant_id, room_id)).status_code == 302
+
+    response = client.get('/meetings/mine', query_string={'cursor': cursor})
+    assert response.status_code == 200
+    assert subjects(response) == ['Reunión 540']
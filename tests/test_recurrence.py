@@ -0,0 +1,37 @@
+"""Reuniones recurrentes: expansión de fechas y reserva de la serie."""
+from datetime import date, timedelta
+
+from app import expand_recurrence
+from models import db, MeetingRoom, MeetingSlot, Room
+
+from conftest import booking
+
+MONDAY = date(2026, 3, 2)
+
+
+def test_expand_recurrence():
+    assert expand_recurrence(MONDAY, 'weekly', count=3) == [MONDAY, date(2026, 3, 9), date(2026, 3, 16)]
+    assert expand_recurrence(MONDAY, 'daily', until=date(2026, 3, 4)) == [MONDAY, date(2026, 3, 3), date(2026, 3, 4)]
+    # El primer límite que se alcance corta la serie
+    assert len(expand_recurrence(MONDAY, 'daily', until=date(2026, 12, 31), count=5)) == 5
+    assert len(expand_recurrence(MONDAY, 'daily', until=date(2026, 12, 31), limit=10)) == 10
+
+
+def test_series_with_a_busy_date_is_rejected_or_skips_it(app, client, room):
+    plant_id, room_id = room
+    first = date.today() + timedelta(days=3)
+    busy = first + timedelta(days=14)
+    assert client.post('/add', data=booking(plant_id, room_id, day=busy, subject='Ocupada')).status_code == 302
+    series = booking(plant_id, room_id, day=first, subject='Serie', recurrence='weekly', repeat_count=4)
+
+    response = client.post('/add', data=series)
+    assert response.status_code == 200
+    with app.app_context():
+        assert db.session.query(MeetingRoom).filter_by(subject='Serie').count() == 0
+
+    assert client.post('/add', data=dict(series, skip_conflicts='y')).status_code == 302
+    with app.app_context():
+        dates = [m.date for m in db.session.query(MeetingRoom).filter_by(subject='Serie').order_by(MeetingRoom.date)]
+        assert dates == [first, first + timedelta(days=7), first + timedelta(days=21)]
+        assert db.session.query(MeetingSlot).count() == 4
+        assert db.session.get(Room, room_id).meeting_count == 4
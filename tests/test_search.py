@@ -0,0 +1,28 @@
+"""Búsqueda de salas libres."""
+from datetime import date, timedelta
+
+import pytest
+
+from conftest import booking
+
+
+def search(client, **params):
+    day = (date.today() + timedelta(days=3)).isoformat()
+    return client.get('/search', query_string={'date': day, 'capacity': 1, **params})
+
+
+@pytest.mark.parametrize('start, end', [(545, 600), (540, 575), (0, 600), (540, 24 * 60), ('x', 600)])
+def test_rejects_times_outside_the_schedule(client, room, start, end):
+    response = search(client, start=start, end=end)
+    text = response.get_data(as_text=True)
+    assert 'dentro de la jornada' in text
+    assert 'Sala de pruebas' not in text
+
+
+def test_lists_only_free_rooms(client, room):
+    plant_id, room_id = room
+    assert search(client, start=540, end=600).get_data(as_text=True).count('Sala de pruebas') == 1
+
+    assert client.post('/add', data=booking(plant_id, room_id, start=570, end=600)).status_code == 302
+    assert 'Sala de pruebas' not in search(client, start=540, end=600).get_data(as_text=True)
+    assert 'Sala de pruebas' in search(client, start=600, end=660).get_data(as_text=True)
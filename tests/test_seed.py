@@ -0,0 +1,15 @@
+"""`flask seed` es idempotente y reporta solo las plantas que agrega."""
+from models import db, Plant
+
+
+def test_seed_reports_only_new_plants(app):
+    runner = app.test_cli_runner()
+    # El fixture ya corrió seed una vez
+    assert '0 plantas nuevas' in runner.invoke(args=['seed']).output
+
+    with app.app_context():
+        db.session.query(Plant).filter(Plant.name.in_(['Planta 3', 'Planta 7'])).delete()
+        db.session.commit()
+    assert '2 plantas nuevas' in runner.invoke(args=['seed']).output
+    with app.app_context():
+        assert db.session.query(Plant).count() == 10
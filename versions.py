@@ -0,0 +1,56 @@
+"""Versiones de caché compartidas entre procesos.
+
+Cada proceso de gunicorn guarda cachés en memoria; cuando un proceso modifica
+datos incrementa la versión correspondiente en cache_versions dentro de la
+misma transacción, y los demás procesos comparan su versión local contra la
+de la base de datos para saber si deben descartar lo que tienen.
+"""
+from sqlalchemy import update
+
+from models import db, CacheVersion
+
+
+def _upsert_increment(name):
+    table = CacheVersion.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(table).values(name=name, version=1)
+        statement = statement.on_duplicate_key_update(version=table.c.version + 1)
+    elif dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(table).values(name=name, version=1)
+        statement = statement.on_conflict_do_update(index_elements=[table.c.name],
+                                                    set_={'version': table.c.version + 1})
+    else:
+        result = db.session.execute(update(table).where(table.c.name == name)
+                                    .values(version=table.c.version + 1))
+        if result.rowcount:
+            return
+        statement = table.insert().values(name=name, version=1)
+    db.session.execute(statement)
+
+
+def bump(*names):
+    """Incrementa las versiones dentro de la transacción actual (sin commit).
+
+    Sin autoflush: las reuniones pendientes se escriben en el commit, dentro
+    del try que convierte el IntegrityError del índice único en un empalme.
+    """
+    with db.session.no_autoflush:
+        for name in sorted(set(names)):
+            _upsert_increment(name)
+
+
+def current(*names):
+    """Versiones actuales en la base de datos; 0 si nunca se han incrementado."""
+    if not names:
+        return {}
+    rows = db.session.query(CacheVersion.name, CacheVersion.version).filter(
+        CacheVersion.name.in_(names)
+    ).all()
+    found = dict(rows)
+    return {name: found.get(name, 0) for name in names}
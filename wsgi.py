@@ -0,0 +1,4 @@
+"""Punto de entrada WSGI (gunicorn wsgi:app); los workers de correo los arranca app.serve()."""
+from app import create_app
+
+app = create_app()